@@ -4,7 +4,7 @@ A2A Adapter - Python library for exposing agents via Google's A2A protocol
 
 # Core imports
 from .core.skills import skill
-from .server import register_agent, build_app
+from .server import register_agent, build_app, serve
 from .card import AgentCardData, Skill
 from .db.registry import AgentCardRepo
 
@@ -1,103 +1,266 @@
 """
 Agent card and discovery routes
 """
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Dict, Any, List, Optional, Tuple, Union
+import asyncio
+import hashlib
+import time
+import orjson
+from fastapi import APIRouter, Depends, Request, Response, HTTPException
+from pydantic import ValidationError
 
 from ..core.rpc import (
-    create_success_response, create_error_response,
+    create_success_response, create_error_response, handle_batch,
+    parse_request, request_id_of,
     JSONRPCException, JSONRPCMethodNotFound, ErrorCodes
 )
 from ..db.registry import AgentCardRepo
-from ..card import JSONRPCResponse, JSONRPCError, JSONRPCErrorData
+from ..card import AgentCardData, SearchRequest
 
-def create_card_router(card_data: Dict[str, Any]) -> APIRouter:
+# Lets clients and shared caches reuse the agent card for a short while
+CARD_CACHE_CONTROL = "public, max-age=60"
+# Seconds a search result is reused for identical queries
+SEARCH_CACHE_TTL = 5
+# Maximum number of cached search results
+SEARCH_CACHE_SIZE = 1024
+
+# A search result page, its serialized items and their ETag
+SearchResult = Tuple[Dict[str, Any], bytes, str]
+
+def create_card_router(card_data: Union[AgentCardData, Dict[str, Any]],
+                       repo: Optional[AgentCardRepo] = None) -> APIRouter:
     """
     Create router for card-related endpoints
     
     Args:
         card_data: The agent card data
+        repo: Agent card repository shared by the app (created if omitted)
         
     Returns:
         FastAPI router
     """
     router = APIRouter()
-    repo = AgentCardRepo()
+    if repo is None:
+        repo = AgentCardRepo()
+    
+    # The card never changes after startup, so serialize it once
+    card_dict = card_data.to_dict() if isinstance(card_data, AgentCardData) else card_data
+    card_bytes = orjson.dumps(card_dict)
+    card_etag = f'"{hashlib.blake2b(card_bytes, digest_size=8).hexdigest()}"'
+    card_headers = {"ETag": card_etag, "Cache-Control": CARD_CACHE_CONTROL}
+    
+    # Recent search results by query. The registry changes rarely, so results
+    # may be up to SEARCH_CACHE_TTL seconds stale.
+    search_cache: Dict[Tuple, Tuple[float, "asyncio.Future[SearchResult]"]] = {}
+    
+    def get_repo() -> AgentCardRepo:
+        """Dependency returning the app-scoped agent card repository"""
+        return repo
+    
+    async def cached_search(repo: AgentCardRepo, *,
+                            skill: Optional[str], domain: Optional[str],
+                            limit: Optional[int], offset: Optional[int],
+                            after: Optional[str]) -> SearchResult:
+        """
+        Search for agent cards, reusing recent results for identical queries
+        
+        The query runs in a worker thread. Concurrent requests for the same
+        query share a single in-flight query instead of each hitting the
+        database.
+        
+        Args:
+            repo: The agent card repository
+            skill: Optional skill name to search for
+            domain: Optional domain to search for
+            limit: Maximum number of results to return (pagination)
+            offset: Number of results to skip (pagination)
+            after: Cursor of the previous page (keyset pagination)
+            
+        Returns:
+            The result page, its serialized items and their ETag
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        key = (skill, domain, limit, offset, after)
+        now = time.monotonic()
+        entry = search_cache.get(key)
+        if entry is None or entry[0] <= now:
+            async def fetch() -> SearchResult:
+                page = await asyncio.to_thread(
+                    repo.search_page, skill=skill, domain=domain, limit=limit,
+                    offset=offset, after=after
+                )
+                body = orjson.dumps(page["items"])
+                return page, body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            
+            def forget_failure(fetch_task: "asyncio.Task[SearchResult]") -> None:
+                # Failed queries are not cached
+                if fetch_task.cancelled() or fetch_task.exception() is not None:
+                    if search_cache.get(key, (0, None))[1] is fetch_task:
+                        del search_cache[key]
+            
+            fetch_task = asyncio.ensure_future(fetch())
+            fetch_task.add_done_callback(forget_failure)
+            
+            # Evict the oldest entry when full
+            search_cache.pop(key, None)
+            if len(search_cache) >= SEARCH_CACHE_SIZE:
+                del search_cache[next(iter(search_cache))]
+            entry = search_cache[key] = (now + SEARCH_CACHE_TTL, fetch_task)
+        
+        result = entry[1]
+        if result.done():
+            return result.result()
+        # Shielded so that a disconnecting client does not cancel the query
+        # for everyone else waiting on it
+        return await asyncio.shield(result)
     
     @router.get("/agentCard", response_model=Dict[str, Any])
-    async def get_agent_card() -> Dict[str, Any]:
+    async def get_agent_card(request: Request) -> Response:
         """Get the agent card"""
-        return card_data
+        if request.headers.get("if-none-match") == card_etag:
+            return Response(status_code=304, headers=card_headers)
+        return Response(
+            content=card_bytes,
+            media_type="application/json",
+            headers=card_headers
+        )
     
     @router.get("/search")
     async def search_query(
+        request: Request,
         skill: Optional[str] = None, 
         domain: Optional[str] = None,
         limit: Optional[int] = None,
-        offset: Optional[int] = None
-    ) -> List[Dict[str, Any]]:
+        offset: Optional[int] = None,
+        after: Optional[str] = None,
+        repo: AgentCardRepo = Depends(get_repo)
+    ) -> Response:
         """
         Search for agents by skill or domain using URL parameters with pagination
         
+        The cursor of the next page, if any, is returned in the
+        X-Next-Cursor header. Results carry an ETag; a request with a
+        matching If-None-Match gets an empty 304 response.
+        
         Args:
             skill: Optional skill name to search for
             domain: Optional domain to search for
             limit: Maximum number of results to return (pagination)
             offset: Number of results to skip (pagination)
+            after: Cursor of the previous page (keyset pagination)
             
         Returns:
             List of matching agent cards
         """
-        return repo.search(skill=skill, domain=domain, limit=limit, offset=offset)
+        try:
+            page, body, etag = await cached_search(repo, skill=skill, domain=domain, limit=limit,
+                                             offset=offset, after=after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        headers = {"ETag": etag}
+        if page["next"]:
+            headers["X-Next-Cursor"] = page["next"]
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers=headers
+        )
     
-    @router.post("/search")
-    async def search_jsonrpc(request: Request) -> JSONResponse:
+    async def _search_one(data: Any, repo: AgentCardRepo) -> Response:
         """
-        Search for skills using JSON-RPC skills/search method
+        Handle a single decoded skills/search request
         
-        This endpoint accepts a JSON-RPC request with method=skills/search
-        and returns a list of agent cards matching the query
+        Args:
+            data: The decoded JSON-RPC request, or an already validated
+                SearchRequest
+            repo: The agent card repository
+            
+        Returns:
+            JSON-RPC response for the request
         """
+        # Echo a usable ID even if the rest of the envelope is invalid
+        request_id = request_id_of(data)
         try:
-            # Parse incoming JSON request
-            data = await request.json()
-            request_id = data.get("id", "")
-            method = data.get("method", "")
-            
-            if method != "skills/search":
-                raise JSONRPCMethodNotFound()
-                
-            # Extract search params
-            params = data.get("params", {})
-            query = params.get("query", "")
-            domain = params.get("domain", None)
-            limit = params.get("limit", None)
-            offset = params.get("offset", None)
+            # Validate the JSON-RPC request
+            if isinstance(data, SearchRequest):
+                search_req = data
+            else:
+                search_req = SearchRequest.model_validate(data)
+            request_id = search_req.id
+            params = search_req.params
             
             # Perform search with pagination
-            results = repo.search(
-                skill=query, 
-                domain=domain,
-                limit=limit,
-                offset=offset
+            page, _, _ = await cached_search(
+                repo,
+                skill=params.query, 
+                domain=params.domain,
+                limit=params.limit,
+                offset=params.offset,
+                after=params.after
             )
             
             # Return JSON-RPC formatted response
-            return create_success_response(request_id, {"agents": results})
+            return create_success_response(search_req.id, {"agents": page["items"], "next": page["next"]})
             
         except JSONRPCException as e:
-            return e.to_response(data.get("id", "") if 'data' in locals() else "")
+            return e.to_response(request_id)
+        except ValidationError as e:
+            # Handle unknown methods and invalid envelopes
+            if any(err["loc"] == ("method",) for err in e.errors()):
+                return JSONRPCMethodNotFound().to_response(request_id)
+            return create_error_response(
+                request_id,
+                ErrorCodes.INVALID_REQUEST,
+                "Invalid Request",
+                {"error": str(e)}
+            )
+        except ValueError as e:
+            # Handle malformed pagination cursors
+            return create_error_response(
+                request_id,
+                ErrorCodes.INVALID_PARAMS,
+                "Invalid params",
+                {"error": str(e)}
+            )
         except Exception as e:
-            error = JSONRPCError(
-                code=ErrorCodes.INTERNAL_ERROR,
-                message="Internal error",
-                data=JSONRPCErrorData(error=str(e))
+            return create_error_response(
+                request_id,
+                ErrorCodes.INTERNAL_ERROR,
+                "Internal error",
+                {"error": str(e)}
             )
-            return JSONResponse({
-                "jsonrpc": "2.0",
-                "id": data.get("id", "") if 'data' in locals() else "",
-                "error": error.dict(exclude_none=True)
-            })
+    
+    @router.post("/search")
+    async def search_jsonrpc(request: Request,
+                             repo: AgentCardRepo = Depends(get_repo)) -> Response:
+        """
+        Search for skills using JSON-RPC skills/search method
+        
+        This endpoint accepts a JSON-RPC request with method=skills/search
+        and returns a list of agent cards matching the query. A JSON-RPC
+        batch (array of requests) runs several searches in one round trip.
+        """
+        body = await request.body()
+        if not body.lstrip().startswith(b"["):
+            # Decode and validate a single request in one pass
+            try:
+                search_req = SearchRequest.model_validate_json(body)
+            except ValidationError:
+                pass  # Decode it again below to report the error with its ID
+            else:
+                return await _search_one(search_req, repo)
+        
+        try:
+            _, data = parse_request(body)
+        except JSONRPCException as e:
+            return e.to_response("")
+        
+        if isinstance(data, list):
+            return await handle_batch(data, lambda item: _search_one(item, repo))
+        return await _search_one(data, repo)
     
     return router
\ No newline at end of file
@@ -1,91 +1,186 @@
 """
 Task execution and event routes
 """
-from typing import Dict, Any, List, Callable, Optional, Union
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, Any, List, Callable, Optional, Sequence, Union
 from fastapi import APIRouter, Request, Response, status, HTTPException
-from fastapi.responses import JSONResponse
 from sse_starlette.sse import EventSourceResponse
 
 from ..core.rpc import (
-    JSONRPCRequest, create_task_accepted_response,
+    create_task_accepted_response,
     JSONRPCException, JSONRPCInvalidRequest, JSONRPCSkillNotFound, JSONRPCTaskNotFound,
-    ErrorCodes, create_error_response
+    ErrorCodes, create_error_response, handle_batch, parse_request, request_id_of
 )
 from ..core.lifecycle import create_task, task_exists, generate_task_events
 from ..core.skills import extract_functions
 
-def create_task_router(agent_obj: Any) -> APIRouter:
+# Interval between SSE keep-alive pings (seconds)
+SSE_PING_INTERVAL = 10
+
+# Headers that stop proxies (e.g. Nginx), caches and compressors from
+# buffering the stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Content-Encoding": "identity",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+@dataclass(slots=True)
+class SendRequest:
+    """A validated tasks/send request"""
+    id: Union[str, int]
+    skill: str
+    input: Union[str, Dict[str, Any]]
+
+def _validate_send(data: Any) -> SendRequest:
+    """
+    Validate a decoded tasks/send JSON-RPC request
+    
+    The envelope is small and fixed, so it is checked by hand rather than
+    through a Pydantic model (JSONRPCRequest documents the same shape).
+    
+    Args:
+        data: The decoded request body
+        
+    Returns:
+        The validated request
+        
+    Raises:
+        JSONRPCInvalidRequest: If the request is not a valid tasks/send call
+    """
+    if not isinstance(data, dict):
+        raise JSONRPCInvalidRequest("Request must be a JSON object")
+    if data.get("jsonrpc", "2.0") != "2.0":
+        raise JSONRPCInvalidRequest("jsonrpc must be '2.0'")
+    request_id = data.get("id")
+    if not isinstance(request_id, (str, int)) or isinstance(request_id, bool):
+        raise JSONRPCInvalidRequest("id must be a string or an integer")
+    if data.get("method") != "tasks/send":
+        raise JSONRPCInvalidRequest("Method must be 'tasks/send'")
+    params = data.get("params")
+    if not isinstance(params, dict):
+        raise JSONRPCInvalidRequest("params must be an object")
+    skill_name = params.get("agentSkill")
+    if not isinstance(skill_name, str):
+        raise JSONRPCInvalidRequest("params.agentSkill must be a string")
+    args = params.get("input")
+    if not isinstance(args, (str, dict)):
+        raise JSONRPCInvalidRequest("params.input must be a string or an object")
+    return SendRequest(id=request_id, skill=skill_name, input=args)
+
+def create_task_router(agent_obj: Any,
+                       functions: Optional[Sequence[Callable]] = None) -> APIRouter:
     """
     Create router for task-related endpoints
     
     Args:
         agent_obj: The agent object
+        functions: The agent's functions, if already extracted
         
     Returns:
         FastAPI router
     """
     router = APIRouter()
     
-    # Extract agent functions
-    agent_functions = extract_functions(agent_obj)
+    if functions is None:
+        functions = extract_functions(agent_obj)
     
-    @router.post("/tasks/send", status_code=status.HTTP_202_ACCEPTED)
-    async def send_task(request: Request) -> JSONResponse:
+    # Index agent functions by skill name for O(1) dispatch
+    # (the first function registered for a name wins)
+    skill_functions: Dict[str, Callable] = {}
+    for f in functions:
+        if hasattr(f, "_a2a_skill"):
+            skill_functions.setdefault(f._a2a_skill, f)
+    
+    async def _send_one(data: Any, executor: Optional[Executor], stream: bool = False) -> Response:
         """
-        Send a task to the agent
+        Handle a single decoded tasks/send request
         
-        This endpoint accepts a JSON-RPC request with method=tasks/send
-        and returns a taskId that can be used to get the task events
+        Args:
+            data: The decoded JSON-RPC request
+            executor: Executor for sync skill functions
+            stream: Stream the task events as the response instead of
+                returning the task ID
+            
+        Returns:
+            JSON-RPC response for the request, or the task's event stream
         """
+        # Echo a usable ID even if the rest of the envelope is invalid
+        request_id = request_id_of(data)
         try:
-            # Parse the JSON-RPC request
-            data = await request.json()
-            # Validate with Pydantic model
-            json_rpc_req = JSONRPCRequest.parse_obj(data)
-            
-            if json_rpc_req.method != "tasks/send":
-                raise JSONRPCInvalidRequest("Method must be 'tasks/send'")
-                
-            skill_name = json_rpc_req.params.agentSkill
-            args = json_rpc_req.params.input
+            send_req = _validate_send(data)
             
             # Find the skill function
-            fn = next((
-                f for f in agent_functions
-                if getattr(f, "_a2a_skill", None) == skill_name
-            ), None)
+            fn = skill_functions.get(send_req.skill)
             
             if fn is None:
-                raise JSONRPCSkillNotFound(skill_name)
+                raise JSONRPCSkillNotFound(send_req.skill)
             
             # Create a task and get its ID
-            task_id = await create_task(fn, args, json_rpc_req.id)
+            task_id = await create_task(fn, send_req.input, send_req.id, executor=executor)
+            
+            if stream:
+                return EventSourceResponse(
+                    generate_task_events(task_id),
+                    ping=SSE_PING_INTERVAL,
+                    headers=SSE_HEADERS
+                )
             
             # Return a JSON-RPC response with the task ID
-            return create_task_accepted_response(json_rpc_req.id, task_id)
+            return create_task_accepted_response(send_req.id, task_id)
             
         except JSONRPCException as e:
             # Handle JSON-RPC exceptions
-            return e.to_response(data.get("id", "") if 'data' in locals() else "")
+            return e.to_response(request_id)
         except Exception as e:
             # Handle unexpected exceptions
             return create_error_response(
-                data.get("id", "") if 'data' in locals() else "",
+                request_id,
                 ErrorCodes.INTERNAL_ERROR,
                 "Internal error",
                 {"error": str(e)}
             )
     
+    @router.post("/tasks/send", status_code=status.HTTP_202_ACCEPTED)
+    async def send_task(request: Request, stream: bool = False) -> Response:
+        """
+        Send a task to the agent
+        
+        This endpoint accepts a JSON-RPC request with method=tasks/send
+        and returns a taskId that can be used to get the task events.
+        With ?stream=true, the task events are streamed on this response
+        instead, saving the round trip of a separate events request.
+        A JSON-RPC batch (array of requests) starts several tasks at once;
+        batches are never streamed.
+        """
+        try:
+            _, data = parse_request(await request.body())
+        except JSONRPCException as e:
+            return e.to_response("")
+        
+        executor = getattr(request.app.state, "executor", None)
+        if isinstance(data, list):
+            return await handle_batch(data, lambda item: _send_one(item, executor))
+        return await _send_one(data, executor, stream)
+    
     @router.get("/tasks/{task_id}/events")
-    async def task_events(task_id: str) -> EventSourceResponse:
+    async def task_events(task_id: str, request: Request) -> EventSourceResponse:
         """
         Get the events for a task
         
-        This endpoint returns a Server-Sent Events stream with the task events
+        This endpoint returns a Server-Sent Events stream with the task events.
+        Clients reconnecting with a Last-Event-ID header resume after that event.
         """
         if not await task_exists(task_id):
             raise JSONRPCTaskNotFound(task_id)
             
-        return EventSourceResponse(generate_task_events(task_id))
+        last_event_id = request.headers.get("last-event-id")
+        return EventSourceResponse(
+            generate_task_events(task_id, last_event_id),
+            ping=SSE_PING_INTERVAL,
+            headers=SSE_HEADERS
+        )
     
     return router
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+ASGI entrypoint for A2A Adapter
+
+This module exposes an ``app`` for process managers that import the
+application themselves, e.g.
+
+    A2A_AGENT_MODULE=examples/crewai_catalog.py \
+        gunicorn -k uvicorn.workers.UvicornWorker -w 4 a2a_adapter.asgi:app
+
+Configuration is read from the environment:
+
+- ``A2A_AGENT_MODULE``: Path to the Python file with the agent definition
+- ``A2A_AGENT_NAME``: Name of the agent variable in the module (optional)
+- ``A2A_HOST`` / ``A2A_PORT``: Public host and port used in the agent card
+"""
+import os
+
+from .loader import load_agent_module
+from .server import build_app
+
+if "A2A_AGENT_MODULE" not in os.environ:
+    raise RuntimeError("A2A_AGENT_MODULE must be set to the path of the agent file")
+
+app = build_app(
+    load_agent_module(os.environ["A2A_AGENT_MODULE"], os.environ.get("A2A_AGENT_NAME")),
+    host=os.environ.get("A2A_HOST", "127.0.0.1"),
+    port=int(os.environ.get("A2A_PORT", 8080))
+)
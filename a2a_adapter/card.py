@@ -1,21 +1,20 @@
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Union, Literal
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column, declarative_base
 from pydantic import BaseModel, Field
-import json
 from datetime import datetime
 
 Base = declarative_base()
 
-@dataclass
+@dataclass(slots=True)
 class Skill:
     name: str
     description: str = ""
     inputTypes: List[str] = field(default_factory=list)
     outputTypes: List[str] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class AgentCardData:
     id: str
     name: str
@@ -30,6 +29,32 @@ class AgentCardData:
     defaultOutputModes: List[str] = field(default_factory=lambda: ["text"])
     extra: dict = field(default_factory=dict)
 
+    def to_dict(self) -> dict:
+        """Build the card as a plain dict; build_app builds it once and reuses it"""
+        # Built by hand: asdict() deep-copies every field through reflection
+        return {
+            "id": self.id,
+            "name": self.name,
+            "version": self.version,
+            "description": self.description,
+            "skills": [
+                {
+                    "name": s.name,
+                    "description": s.description,
+                    "inputTypes": s.inputTypes,
+                    "outputTypes": s.outputTypes,
+                }
+                for s in self.skills
+            ],
+            "url": self.url,
+            "endpoints": self.endpoints,
+            "capabilities": self.capabilities,
+            "authentication": self.authentication,
+            "defaultInputModes": self.defaultInputModes,
+            "defaultOutputModes": self.defaultOutputModes,
+            "extra": self.extra,
+        }
+
 class AgentCard(Base):
     __tablename__ = "agent_cards"
     id: Mapped[str] = mapped_column(sa.String, primary_key=True)
@@ -38,18 +63,32 @@ class AgentCard(Base):
     skills_text: Mapped[str] = mapped_column(sa.String)
     updated_at: Mapped[datetime] = mapped_column(sa.DateTime, default=datetime.utcnow)
 
+    # Full-text index over skill names on PostgreSQL; SQLite uses a trigram
+    # FTS5 index and other databases a plain substring match (see
+    # AgentCardRepo.search_page)
+    __table_args__ = (
+        sa.Index(
+            "ix_agent_cards_skills_tsv",
+            sa.func.to_tsvector(sa.literal_column("'english'"), sa.column("skills_text")),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
     @classmethod
-    def from_data(cls, data: AgentCardData):
+    def from_data(cls, data: AgentCardData, card: Optional[dict] = None):
         return cls(
             id=data.id,
             version=data.version,
-            card=asdict(data),
+            card=data.to_dict() if card is None else card,
             skills_text=" ".join([s.name for s in data.skills]),
         )
 
     def to_dict(self) -> dict:
         return self.card
 
+# Full-text search document over skill names, matching the GIN index above
+skills_tsvector = sa.func.to_tsvector(sa.literal_column("'english'"), AgentCard.skills_text)
+
 # JSON-RPC Pydantic models with proper schema constraints
 class TaskInput(BaseModel):
     """Task input with flexible type support"""
@@ -103,10 +142,11 @@ class SearchParams(BaseModel):
     domain: Optional[str] = None
     limit: Optional[int] = None
     offset: Optional[int] = None
+    after: Optional[str] = None
 
 class SearchRequest(BaseModel):
     """JSON-RPC request for skills/search"""
     jsonrpc: Literal["2.0"] = "2.0"
     id: Union[str, int]
-    method: Literal["skills/search"] = "skills/search"
-    params: SearchParams
\ No newline at end of file
+    method: Literal["skills/search"]
+    params: SearchParams = Field(default_factory=SearchParams)
\ No newline at end of file
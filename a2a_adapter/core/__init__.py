@@ -1,7 +1,11 @@
-from .skills import skill, skills_for_agent, extract_skills, extract_functions
+from .skills import (
+    skill, skills_for_agent, extract_skills, extract_functions, skills_from_functions,
+    is_async_callable
+)
 from .rpc import (
-    ErrorCodes, JSONRPCException, JSONRPCInvalidRequest,
-    JSONRPCMethodNotFound, JSONRPCSkillNotFound, JSONRPCTaskNotFound,
-    create_success_response, create_error_response, create_task_accepted_response
+    ErrorCodes, JSONRPCException, JSONRPCParseError, JSONRPCInvalidRequest,
+    JSONRPCMethodNotFound, JSONRPCSkillNotFound, JSONRPCTaskNotFound, JSONRPCTaskLimitReached,
+    create_success_response, create_error_response, create_task_accepted_response,
+    request_id_of, parse_request, handle_batch, MAX_BATCH
 )
 from .lifecycle import create_task, get_task, task_exists, generate_task_events
\ No newline at end of file
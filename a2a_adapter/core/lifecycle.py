@@ -4,20 +4,50 @@ Task lifecycle management for A2A Adapter
 This module provides task storage and event generation for A2A tasks.
 """
 from typing import Dict, Any, Optional, List, AsyncGenerator, Callable, Union
+from collections import deque
+from concurrent.futures import Executor
 import asyncio
+import itertools
+import os
 import time
-import json
-import uuid
+import secrets
 import inspect
-from .rpc import format_sse_event
+import weakref
+from .rpc import format_sse_event, JSONRPCTaskLimitReached
+from .skills import is_async_callable
+
+# Maximum number of tasks kept in the store; finished tasks are evicted to
+# make room, and new tasks are rejected while every stored task is unfinished
+MAX_TASKS = 10_000
+# Seconds a finished task is kept before it is evicted
+TASK_TTL = 3600
+# Number of recent events kept per task for Last-Event-ID resumption
+EVENT_BUFFER_SIZE = 100
+# Seconds an event subscriber waits for an accepted task to start, not
+# counting time spent waiting for an execution slot
+TASK_START_TIMEOUT = 30
+# Maximum number of tasks executing at once; further tasks wait as "accepted"
+MAX_INFLIGHT_TASKS = int(os.environ.get("A2A_MAX_INFLIGHT", 256))
 
 # Global task store
-# Maps task_id to task state
+# Maps task_id to task state. The store is only touched from the event loop
+# and never across an await, so it needs no locks: every read-modify-write
+# below runs to completion before another coroutine is scheduled.
 _tasks: Dict[str, Dict[str, Any]] = {}
-_task_locks: Dict[str, asyncio.Lock] = {}  # Per-task locks
-_global_lock = asyncio.Lock()  # Global lock for dictionary operations
+# IDs of the finished tasks in the store, oldest first
+_finished: Dict[str, None] = {}
+# Execution slots per event loop. A semaphore binds to the first loop that
+# waits on it, so each loop (e.g. each TestClient or reload) gets its own
+_task_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+    weakref.WeakKeyDictionary()
+
+_TERMINAL_STATES = ("completed", "failed")
 
-async def create_task(skill_fn: Callable, args: Any, request_id: Union[str, int]) -> str:
+# Wire format of a buffered event; events are encoded once, when recorded
+_SSE_EVENT = b"id: %d\nevent: %s\ndata: %s\n\n"
+
+async def create_task(skill_fn: Callable, args: Any, request_id: Union[str, int],
+                      executor: Optional[Executor] = None) -> str:
     """
     Create a new task
     
@@ -25,84 +55,193 @@ async def create_task(skill_fn: Callable, args: Any, request_id: Union[str, int]
         skill_fn: The skill function to execute
         args: Arguments to pass to the function
         request_id: The original JSON-RPC request ID
+        executor: Executor for sync skill functions (default: the loop's default executor)
         
     Returns:
         Task ID
+        
+    Raises:
+        JSONRPCTaskLimitReached: If the store is full of unfinished tasks
     """
-    task_id = str(uuid.uuid4())
-    
-    # Create a lock for this task
-    task_lock = asyncio.Lock()
-    
-    # Use global lock for dictionary operations
-    async with _global_lock:
-        _task_locks[task_id] = task_lock
+    task_id = secrets.token_hex(16)
     
     # Create the task with initial state
-    async with task_lock:
-        async with _global_lock:
-            _tasks[task_id] = {
-                "status": "accepted",
-                "request_id": request_id,
-                "function": skill_fn,
-                "args": args,
-                "result": None,
-                "error": None,
-                "created_at": time.time(),
-                "last_update": time.time()
-            }
+    if len(_tasks) >= MAX_TASKS:
+        _evict_tasks(len(_tasks) - MAX_TASKS + 1)
+        if len(_tasks) >= MAX_TASKS:
+            raise JSONRPCTaskLimitReached()
+    task = {
+        "id": task_id,
+        "status": "accepted",
+        "request_id": request_id,
+        "function": skill_fn,
+        "args": args,
+        "executor": executor,
+        "result": None,
+        "error": None,
+        "subscribers": 0,
+        "created_at": time.time(),
+        "state_event": asyncio.Event(),
+        "events": deque(maxlen=EVENT_BUFFER_SIZE),
+        "next_event_id": itertools.count()
+    }
+    _record_event(task, "accepted", {})
+    _tasks[task_id] = task
     
     # Start task execution in background
-    asyncio.create_task(_execute_task(task_id))
+    asyncio.create_task(_execute_task(task))
     
     return task_id
 
-async def _execute_task(task_id: str) -> None:
+def _record_event(task: Dict[str, Any], event_type: str, data: Any) -> None:
     """
-    Execute a task
+    Append an event to the task's event buffer
     
-    This function is called in the background to execute a task
-    and update its status
+    Each event gets a monotonically increasing ID which is sent to the
+    client and used to resume the stream via Last-Event-ID. The event is
+    stored already encoded, so every subscriber sends the same bytes.
+    
+    Args:
+        task: The task state
+        event_type: Type of event (accepted, running, completed, failed)
+        data: Event data
+    """
+    event_id = next(task["next_event_id"])
+    event = format_sse_event(event_type, task["request_id"], data)
+    task["events"].append(
+        (event_id, _SSE_EVENT % (event_id, event_type.encode(), event["data"].encode()))
+    )
+
+def _transition(task: Dict[str, Any], status: str) -> None:
+    """
+    Move a task to a new status and wake up any event subscribers
+    
+    Args:
+        task: The task state
+        status: The new task status
+    """
+    task["status"] = status
+    
+    if status == "completed":
+        _record_event(task, status, task["result"])
+    elif status == "failed":
+        _record_event(task, status, {"error": task["error"]})
+    else:
+        _record_event(task, status, {})
+    
+    # Wake everyone waiting on the current state, then re-arm for the next one
+    task["state_event"].set()
+    task["state_event"] = asyncio.Event()
+    
+    # Expire finished tasks after TASK_TTL
+    if status in _TERMINAL_STATES:
+        _finished[task["id"]] = None
+        asyncio.get_running_loop().call_later(TASK_TTL, _forget_task, task["id"])
+
+def _forget_task(task_id: str) -> None:
+    """
+    Remove a task from the store
     
     Args:
         task_id: The task ID
     """
-    if task_id not in _tasks or task_id not in _task_locks:
-        return
-        
-    lock = _task_locks[task_id]
+    _tasks.pop(task_id, None)
+    _finished.pop(task_id, None)
+
+def _evict_tasks(count: int) -> None:
+    """
+    Evict the oldest finished tasks from the store
+    
+    Only finished tasks are visited, so unfinished tasks cost nothing.
+    Tasks that still have event subscribers are kept so that their
+    streams can finish.
+    
+    Args:
+        count: Maximum number of tasks to evict
+    """
+    evicted = []
+    for task_id in _finished:
+        if not _tasks[task_id]["subscribers"]:
+            evicted.append(task_id)
+            if len(evicted) >= count:
+                break
+    for task_id in evicted:
+        _forget_task(task_id)
+
+def _loop_slots() -> asyncio.Semaphore:
+    """
+    Get the execution slots of the running event loop
     
+    Returns:
+        Semaphore allowing MAX_INFLIGHT_TASKS tasks to run at once
+    """
+    loop = asyncio.get_running_loop()
+    slots = _task_slots.get(loop)
+    if slots is None:
+        slots = _task_slots[loop] = asyncio.Semaphore(MAX_INFLIGHT_TASKS)
+    return slots
+
+async def _execute_task(task: Dict[str, Any]) -> None:
+    """
+    Execute a task once an execution slot is free
+    
+    This function is called in the background for every new task. At most
+    MAX_INFLIGHT_TASKS tasks run at once; the others stay "accepted" until
+    a slot frees up.
+    
+    Args:
+        task: The task state, passed directly so that execution never
+            looks the task up in the store
+    """
     try:
-        # Get task data
-        fn = None
-        args = None
-        async with lock:
-            if task_id not in _tasks:
-                return
-            task = _tasks[task_id]
-            fn = task["function"]
-            args = task["args"]
-            # Update task status to running
-            task["status"] = "running"
-            task["last_update"] = time.time()
+        async with _loop_slots():
+            await _run_task(task)
+    except asyncio.CancelledError:
+        # Fail the task so subscribers don't wait forever, whether it was
+        # running or still waiting for a slot, then let the cancellation
+        # propagate
+        if task["status"] not in _TERMINAL_STATES:
+            task["error"] = "Task was cancelled"
+            _transition(task, "failed")
+        raise
+
+async def _run_task(task: Dict[str, Any]) -> None:
+    """
+    Run a task and update its status
+    
+    Args:
+        task: The task state
+    """
+    if task["status"] != "accepted":
+        return  # Task already failed, e.g. timed out waiting to start
+    
+    try:
+        # Get task data and update task status to running
+        fn, args, executor = task["function"], task["args"], task["executor"]
+        _transition(task, "running")
         
-        # Execute function outside the lock
-        result = await fn(args) if inspect.iscoroutinefunction(fn) else fn(args)
+        # Execute function
+        is_coro = getattr(fn, "_a2a_is_coro", None)
+        if is_coro is None:
+            is_coro = is_async_callable(fn)
+        if is_coro:
+            result = await fn(args)
+        else:
+            # Run sync skills in a worker thread so they don't block the event loop
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, fn, args)
+            # Wrappers that hide an async implementation return an awaitable
+            if inspect.isawaitable(result):
+                result = await result
         
         # Update task with result
-        async with lock:
-            if task_id in _tasks:
-                _tasks[task_id]["result"] = result
-                _tasks[task_id]["status"] = "completed"
-                _tasks[task_id]["last_update"] = time.time()
+        task["result"] = result
+        _transition(task, "completed")
     
     except Exception as e:
         # Handle exceptions and update task status
-        async with lock:
-            if task_id in _tasks:
-                _tasks[task_id]["error"] = str(e)
-                _tasks[task_id]["status"] = "failed"
-                _tasks[task_id]["last_update"] = time.time()
+        task["error"] = str(e)
+        _transition(task, "failed")
 
 async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -114,12 +253,7 @@ async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Task data or None if not found
     """
-    if task_id not in _tasks or task_id not in _task_locks:
-        return None
-        
-    lock = _task_locks[task_id]
-    async with lock:
-        return _tasks.get(task_id)
+    return _tasks.get(task_id)
 
 async def task_exists(task_id: str) -> bool:
     """
@@ -131,93 +265,69 @@ async def task_exists(task_id: str) -> bool:
     Returns:
         True if task exists, False otherwise
     """
-    async with _global_lock:
-        return task_id in _tasks
+    return task_id in _tasks
 
-async def generate_task_events(task_id: str) -> AsyncGenerator[Dict[str, str], None]:
+async def generate_task_events(task_id: str,
+                               last_event_id: Optional[str] = None) -> AsyncGenerator[bytes, None]:
     """
     Generate events for a task
     
+    Events are replayed from the task's event buffer, so a client that
+    reconnects with a Last-Event-ID only receives the events it missed.
+    
     Args:
         task_id: The task ID
+        last_event_id: ID of the last event the client received, if any
         
     Yields:
-        Server-Sent Events for the task
+        Encoded Server-Sent Events for the task
     """
-    if task_id not in _tasks or task_id not in _task_locks:
+    task = _tasks.get(task_id)
+    if task is None:
         raise KeyError(f"Task {task_id} not found")
         
-    lock = _task_locks[task_id]
-    request_id = None
-    task_status = None
-    heartbeat_interval = 10  # seconds
-    last_heartbeat = time.time()
-    
-    # Get initial task data with lock
-    async with lock:
-        task = _tasks[task_id]
-        request_id = task["request_id"]
-        task_status = task["status"]
-    
-    # Send initial accepted event
-    yield format_sse_event("accepted", request_id, {})
-    
-    # Wait for task to start running with timeout
-    timeout_start = time.time()
-    while task_status == "accepted":
-        # Send heartbeat if needed
-        if time.time() - last_heartbeat > heartbeat_interval:
-            yield format_sse_event("heartbeat", request_id, {"timestamp": time.time()})
-            last_heartbeat = time.time()
+    loop = asyncio.get_running_loop()
+    start_deadline = loop.time() + TASK_START_TIMEOUT
+    
+    try:
+        last_id = int(last_event_id) if last_event_id is not None else -1
+    except ValueError:
+        last_id = -1
+    
+    task["subscribers"] += 1
+    
+    try:
+        while True:
+            # Collect missed events and pick up the current state event
+            pending = [(event_id, event) for event_id, event in task["events"] if event_id > last_id]
+            task_status = task["status"]
+            state_event = task["state_event"]
             
-        # Check timeout (30 seconds)
-        if time.time() - timeout_start > 30:
-            async with lock:
-                if task_id in _tasks:
-                    _tasks[task_id]["status"] = "failed"
-                    _tasks[task_id]["error"] = "Task execution timed out waiting to start"
-                    task_status = "failed"
-            break
-        
-        # Check status with lock
-        async with lock:
-            if task_id in _tasks:
-                task_status = _tasks[task_id]["status"]
-            else:
-                return  # Task was deleted
-                
-        await asyncio.sleep(0.1)
-    
-    # Send running event if task didn't fail during startup
-    if task_status == "running":
-        yield format_sse_event("running", request_id, {})
-        
-        # Wait for task to complete or fail, sending heartbeats
-        while task_status == "running":
-            # Send heartbeat if needed
-            if time.time() - last_heartbeat > heartbeat_interval:
-                yield format_sse_event("heartbeat", request_id, {"timestamp": time.time()})
-                last_heartbeat = time.time()
-                
-            # Check status with lock
-            async with lock:
-                if task_id in _tasks:
-                    task_status = _tasks[task_id]["status"]
-                else:
-                    return  # Task was deleted
-                    
-            await asyncio.sleep(0.1)
-    
-    # Send final event based on final status
-    result = None
-    error = None
-    
-    async with lock:
-        if task_id in _tasks:
-            result = _tasks[task_id].get("result")
-            error = _tasks[task_id].get("error")
-    
-    if task_status == "completed":
-        yield format_sse_event("completed", request_id, result)
-    else:
-        yield format_sse_event("failed", request_id, {"error": error})
\ No newline at end of file
+            for event_id, event in pending:
+                yield event
+                last_id = event_id
+                # Give the event loop a chance to flush each event to the socket
+                # so that fast transitions are not coalesced into a single chunk
+                await asyncio.sleep(0)
+            
+            if task_status in _TERMINAL_STATES:
+                return
+            
+            # Wait for the next transition. This single wait replaces separate
+            # heartbeat and status polling: only the start of the task is bounded,
+            # and keep-alive pings are sent by the SSE response itself.
+            timeout = max(start_deadline - loop.time(), 0) if task_status == "accepted" else None
+            try:
+                await asyncio.wait_for(state_event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                if _loop_slots().locked():
+                    # Still queued behind the in-flight limit; restart the clock
+                    start_deadline = loop.time() + TASK_START_TIMEOUT
+                # Check timeout waiting for the task to start
+                elif task["status"] == "accepted":
+                    task["error"] = "Task execution timed out waiting to start"
+                    _transition(task, "failed")
+    finally:
+        # Runs on normal completion and when the stream is cancelled because
+        # the client disconnected
+        task["subscribers"] -= 1
@@ -4,18 +4,22 @@ JSON-RPC module for A2A Adapter
 This module provides JSON-RPC 2.0 utilities and models for handling
 requests and responses according to the A2A protocol specification.
 """
-from typing import Dict, List, Any, Optional, Union, Literal
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Tuple, Union, Literal
 from pydantic import BaseModel, Field
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import Response
+import asyncio
+import orjson
 
 # Re-export models from card.py for backward compatibility
 # Eventually, these should be moved here completely
 from ..card import (
     JSONRPCRequest, JSONRPCResponse, JSONRPCError, 
-    JSONRPCErrorData, SearchParams
+    JSONRPCErrorData, SearchParams, SearchRequest, TaskResponseData
 )
 
+# Maximum number of requests accepted in a single JSON-RPC batch
+MAX_BATCH = 256
+
 # JSON-RPC Error codes
 class ErrorCodes:
     PARSE_ERROR = -32700
@@ -27,6 +31,7 @@ class ErrorCodes:
     SERVER_ERROR_END = -32099
     TASK_NOT_FOUND = -32001
     SKILL_NOT_FOUND = -32002
+    TASK_LIMIT_REACHED = -32003
 
 class JSONRPCException(Exception):
     """Base exception for JSON-RPC errors with proper error handling"""
@@ -36,11 +41,18 @@ class JSONRPCException(Exception):
         self.data = JSONRPCErrorData(error=message, details=data)
         super().__init__(message)
     
-    def to_response(self, request_id: Union[str, int]) -> JSONResponse:
+    def to_response(self, request_id: Union[str, int]) -> Response:
         """Convert exception to proper JSON-RPC response"""
+        if self.data.details is None:
+            return _error_body_response(request_id, self.code, self.message, with_data=True)
         error = JSONRPCError(code=self.code, message=self.message, data=self.data)
         response = JSONRPCResponse(jsonrpc="2.0", id=request_id, error=error)
-        return JSONResponse(content=response.dict(exclude_none=True))
+        return _json_response(response)
+
+class JSONRPCParseError(JSONRPCException):
+    """Exception for request bodies that are not valid JSON"""
+    def __init__(self, details: Optional[Dict[str, Any]] = None):
+        super().__init__(code=ErrorCodes.PARSE_ERROR, message="Parse error", data=details)
 
 class JSONRPCInvalidRequest(JSONRPCException):
     """Exception for invalid JSON-RPC requests"""
@@ -68,21 +80,139 @@ class JSONRPCTaskNotFound(JSONRPCException):
             message=f"Task '{task_id}' not found"
         )
 
-def create_success_response(request_id: Union[str, int], result: Any) -> JSONResponse:
+class JSONRPCTaskLimitReached(JSONRPCException):
+    """Exception for new tasks when the task store is full of unfinished tasks"""
+    def __init__(self):
+        super().__init__(
+            code=ErrorCodes.TASK_LIMIT_REACHED,
+            message="Too many unfinished tasks"
+        )
+
+# Envelope of error responses; the id and the error object vary
+_ERROR_ENVELOPE = b'{"jsonrpc":"2.0","id":%s,"error":%s}'
+
+# Pre-rendered error objects for the errors raised without details,
+# keyed by (code, message, with_data)
+_ERROR_OBJECTS: Dict[Tuple[int, str, bool], bytes] = {}
+for _code, _message in (
+    (ErrorCodes.INVALID_REQUEST, "Invalid Request"),
+    (ErrorCodes.METHOD_NOT_FOUND, "Method not found"),
+    (ErrorCodes.INVALID_PARAMS, "Invalid params"),
+    (ErrorCodes.INTERNAL_ERROR, "Internal error"),
+):
+    _ERROR_OBJECTS[_code, _message, False] = orjson.dumps({"code": _code, "message": _message})
+    _ERROR_OBJECTS[_code, _message, True] = orjson.dumps(
+        {"code": _code, "message": _message, "data": {"error": _message}}
+    )
+
+def _error_body_response(request_id: Union[str, int], code: int, message: str,
+                         with_data: bool = False) -> Response:
+    """
+    Render an error response without details from the error envelope
+    
+    Args:
+        request_id: The ID from the request
+        code: The error code
+        message: The error message
+        with_data: Whether to echo the message as data.error, as
+            JSONRPCException does
+        
+    Returns:
+        FastAPI Response with a JSON body
+    """
+    error = _ERROR_OBJECTS.get((code, message, with_data))
+    if error is None:
+        error = {"code": code, "message": message}
+        if with_data:
+            error["data"] = {"error": message}
+        error = orjson.dumps(error)
+    return Response(
+        content=_ERROR_ENVELOPE % (orjson.dumps(request_id), error),
+        media_type="application/json"
+    )
+
+def request_id_of(data: Any) -> Union[str, int]:
+    """
+    Get the ID of a decoded JSON-RPC request, even if the request is invalid
+    
+    Args:
+        data: The decoded request
+        
+    Returns:
+        The request ID, or an empty string if it is missing or not a
+        string or integer
+    """
+    if isinstance(data, dict):
+        request_id = data.get("id")
+        if isinstance(request_id, (str, int)) and not isinstance(request_id, bool):
+            return request_id
+    return ""
+
+def parse_request(body: bytes) -> Tuple[Union[str, int], Any]:
+    """
+    Decode a JSON-RPC request body
+    
+    Args:
+        body: The raw request body
+        
+    Returns:
+        The request ID (see request_id_of) and the decoded request or batch
+        
+    Raises:
+        JSONRPCParseError: If the body is not valid JSON
+    """
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise JSONRPCParseError({"error": str(e)})
+    return request_id_of(data), data
+
+def _json_response(response: JSONRPCResponse, status_code: int = 200) -> Response:
+    """
+    Serialize a JSON-RPC response envelope
+    
+    The envelope is dumped straight to JSON by pydantic-core, skipping the
+    intermediate dict and the json.dumps pass of JSONResponse.
+    
+    Args:
+        response: The JSON-RPC response
+        status_code: HTTP status code
+        
+    Returns:
+        FastAPI Response with a JSON body
+    """
+    return Response(
+        content=response.model_dump_json(exclude_none=True),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+def create_success_response(request_id: Union[str, int], result: Any) -> Response:
     """
     Create a JSON-RPC 2.0 success response
     
+    Results orjson can encode are dumped directly; others (e.g. Pydantic
+    models) go through the Pydantic response model.
+    
     Args:
         request_id: The ID from the request
         result: The result data
         
     Returns:
-        FastAPI JSONResponse
+        FastAPI Response
     """
+    if isinstance(result, dict):
+        try:
+            return Response(
+                content=orjson.dumps({"jsonrpc": "2.0", "id": request_id, "result": result}),
+                media_type="application/json"
+            )
+        except TypeError:
+            pass  # Not natively serializable by orjson
     response = JSONRPCResponse(jsonrpc="2.0", id=request_id, result=result)
-    return JSONResponse(content=response.dict(exclude_none=True))
+    return _json_response(response)
 
-def create_error_response(request_id: Union[str, int], code: int, message: str, data: Optional[Any] = None) -> JSONResponse:
+def create_error_response(request_id: Union[str, int], code: int, message: str, data: Optional[Any] = None) -> Response:
     """
     Create a JSON-RPC 2.0 error response
     
@@ -93,14 +223,19 @@ def create_error_response(request_id: Union[str, int], code: int, message: str,
         data: Additional error data
         
     Returns:
-        FastAPI JSONResponse
+        FastAPI Response
     """
-    error_data = JSONRPCErrorData(error=message, details=data) if data else None
+    if not data:
+        return _error_body_response(request_id, code, message)
+    error_data = JSONRPCErrorData(error=message, details=data)
     error = JSONRPCError(code=code, message=message, data=error_data)
     response = JSONRPCResponse(jsonrpc="2.0", id=request_id, error=error)
-    return JSONResponse(content=response.dict(exclude_none=True))
+    return _json_response(response)
 
-def create_task_accepted_response(request_id: Union[str, int], task_id: str) -> JSONResponse:
+# Pre-rendered tasks/send response; only the id and task ID vary
+_ACCEPTED_TEMPLATE = b'{"jsonrpc":"2.0","id":%s,"result":{"taskId":%s,"status":"accepted"}}'
+
+def create_task_accepted_response(request_id: Union[str, int], task_id: str) -> Response:
     """
     Create a task accepted response for A2A
     
@@ -109,25 +244,63 @@ def create_task_accepted_response(request_id: Union[str, int], task_id: str) ->
         task_id: The generated task ID
         
     Returns:
-        FastAPI JSONResponse with 202 Accepted status and JSON-RPC 2.0 envelope
+        FastAPI Response with 202 Accepted status and JSON-RPC 2.0 envelope
     """
-    # Create proper JSON-RPC 2.0 response with taskId in result field
-    response = JSONRPCResponse(
-        jsonrpc="2.0",
-        id=request_id,
-        result={"taskId": task_id, "status": "accepted"}
+    return Response(
+        content=_ACCEPTED_TEMPLATE % (orjson.dumps(request_id), orjson.dumps(task_id)),
+        status_code=202,
+        media_type="application/json"
     )
+
+async def handle_batch(items: List[Any], handler: Callable[[Any], Awaitable[Response]]) -> Response:
+    """
+    Handle a JSON-RPC 2.0 batch request
+    
+    Each request in the batch is handled concurrently and the individual
+    response bodies are joined into a JSON array.
     
-    # Return as JSON with 202 Accepted status
-    return JSONResponse(
-        content=response.dict(exclude_none=True),
-        status_code=202
+    Args:
+        items: The decoded batch
+        handler: Coroutine function handling one decoded request
+        
+    Returns:
+        FastAPI Response with the array of responses, or a single error
+        response if the batch is empty or too large
+    """
+    if not items:
+        return create_error_response("", ErrorCodes.INVALID_REQUEST, "Invalid Request",
+                                     {"error": "Batch must not be empty"})
+    if len(items) > MAX_BATCH:
+        return create_error_response("", ErrorCodes.INVALID_REQUEST, "Invalid Request",
+                                     {"error": f"Batch must not exceed {MAX_BATCH} requests"})
+    
+    responses = await asyncio.gather(*(handler(item) for item in items))
+    return Response(
+        content=b"[" + b",".join(response.body for response in responses) + b"]",
+        media_type="application/json"
     )
 
+# Pre-rendered envelopes for events without a payload; only the id varies
+_STATUS_EVENT_TEMPLATES = {
+    status: '{"jsonrpc":"2.0","id":%s,"result":{"status":"' + status + '"}}'
+    for status in ("accepted", "running")
+}
+
+# Pre-rendered envelopes for events with a payload; the id and payload vary
+_COMPLETED_EVENT_TEMPLATE = '{"jsonrpc":"2.0","id":%s,"result":{"status":"completed","data":%s}}'
+_FAILED_EVENT_TEMPLATE = (
+    '{"jsonrpc":"2.0","id":%s,"error":{"code":' + str(ErrorCodes.SERVER_ERROR_START)
+    + ',"message":"Task execution failed","data":{"error":%s}}}'
+)
+
 def format_sse_event(event_type: str, request_id: Union[str, int], data: Any) -> Dict[str, str]:
     """
     Format a server-sent event with JSON-RPC envelope
     
+    Envelopes are rendered from fixed templates, with the id and payload
+    encoded by orjson. Payloads orjson cannot encode (e.g. Pydantic models)
+    fall back to the Pydantic response models.
+    
     Args:
         event_type: Type of event (accepted, running, completed, failed)
         request_id: Original request ID
@@ -136,28 +309,42 @@ def format_sse_event(event_type: str, request_id: Union[str, int], data: Any) ->
     Returns:
         Dict formatted for SSE
     """
-    if event_type == "failed":
-        error_data = JSONRPCErrorData(error=data.get("error", "Unknown error"))
-        json_data = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "error": {
-                "code": ErrorCodes.SERVER_ERROR_START,
-                "message": "Task execution failed",
-                "data": error_data.dict(exclude_none=True) if hasattr(error_data, "dict") else error_data
+    encoded_id = orjson.dumps(request_id).decode()
+    
+    template = _STATUS_EVENT_TEMPLATES.get(event_type)
+    if template is not None:
+        return {"event": event_type, "data": template % encoded_id}
+    
+    try:
+        if event_type == "failed":
+            error = data.get("error", "Unknown error")
+            if isinstance(error, str):
+                return {
+                    "event": event_type,
+                    "data": _FAILED_EVENT_TEMPLATE % (encoded_id, orjson.dumps(error).decode())
+                }
+        elif event_type == "completed" and data:
+            return {
+                "event": event_type,
+                "data": _COMPLETED_EVENT_TEMPLATE % (encoded_id, orjson.dumps(data).decode())
             }
-        }
+    except TypeError:
+        pass  # Not natively serializable by orjson
+    
+    if event_type == "failed":
+        error = JSONRPCError(
+            code=ErrorCodes.SERVER_ERROR_START,
+            message="Task execution failed",
+            data=JSONRPCErrorData(error=data.get("error", "Unknown error"))
+        )
+        response = JSONRPCResponse(jsonrpc="2.0", id=request_id, error=error)
     else:
-        result = {"status": event_type}
+        result = TaskResponseData(status=event_type)
         if event_type == "completed" and data:
-            result["data"] = data
-        json_data = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "result": result
-        }
+            result.data = data
+        response = JSONRPCResponse(jsonrpc="2.0", id=request_id, result=result)
     
     return {
         "event": event_type,
-        "data": json.dumps(json_data)
-    }
\ No newline at end of file
+        "data": response.model_dump_json(exclude_none=True)
+    }
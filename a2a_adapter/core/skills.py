@@ -1,13 +1,11 @@
 """
 Skills module for A2A Adapter
 
-This module provides the skill decorator and functions to manage
-agent skills in a per-agent registry.
+This module provides the skill decorator and functions to discover
+the skills of an agent.
 """
-from typing import Dict, List, Any, Callable, TypeVar, Optional, cast
-from functools import wraps
+from typing import Dict, List, Any, Callable, Iterable, Tuple, TypeVar, Optional
 import inspect
-import weakref
 from dataclasses import dataclass, field
 
 from ..card import Skill
@@ -15,8 +13,23 @@ from ..card import Skill
 # Type variable for generic function
 F = TypeVar('F', bound=Callable[..., Any])
 
-# Per-agent skill registry using weak references to avoid memory leaks
-_skill_registries = weakref.WeakKeyDictionary()
+def is_async_callable(fn: Callable) -> bool:
+    """
+    Check whether calling a function returns a coroutine
+    
+    Unlike inspect.iscoroutinefunction alone, this also detects callable
+    objects (e.g. framework tool wrappers) whose __call__ is async.
+    
+    Args:
+        fn: The function or callable object
+        
+    Returns:
+        True if the callable is async
+    """
+    return (
+        inspect.iscoroutinefunction(fn)
+        or inspect.iscoroutinefunction(getattr(fn, "__call__", None))
+    )
 
 def skill(name: str, inputTypes: List[str], outputTypes: List[str]) -> Callable[[F], F]:
     """
@@ -50,43 +63,17 @@ def skill(name: str, inputTypes: List[str], outputTypes: List[str]) -> Callable[
         # Mark the function with skill name for discovery
         fn._a2a_skill = name
         
-        @wraps(fn)
-        async def wrapper(*args: Any, **kwargs: Any) -> Any:
-            """Wraps the function to handle both sync and async functions"""
-            if inspect.iscoroutinefunction(fn):
-                return await fn(*args, **kwargs)
-            else:
-                return fn(*args, **kwargs)
-        
-        # Copy skill attributes to wrapper
-        wrapper._a2a_skill = name
-        wrapper._a2a_skills = fn._a2a_skills
+        # Decide once at decoration time whether the function is a
+        # coroutine. The function is returned unwrapped, so calling a
+        # skill costs no extra frame
+        fn._a2a_is_coro = is_async_callable(fn)
         
-        return cast(F, wrapper)
+        return fn
     return decorator
 
-def register_skill_for_agent(agent: Any, skill_fn: Callable) -> None:
-    """
-    Register a skill function for a specific agent
-    
-    Args:
-        agent: The agent object
-        skill_fn: The skill function to register
-    """
-    if not hasattr(skill_fn, "_a2a_skills"):
-        return
-        
-    # Initialize agent's skill registry if needed
-    if agent not in _skill_registries:
-        _skill_registries[agent] = []
-        
-    # Add skills to the agent's registry
-    for skill_def in skill_fn._a2a_skills:
-        _skill_registries[agent].append(skill_def)
-
 def skills_for_agent(agent: Any) -> List[Skill]:
     """
-    Get all skills registered for an agent
+    Get all skills declared for an agent
     
     Args:
         agent: The agent object
@@ -94,15 +81,15 @@ def skills_for_agent(agent: Any) -> List[Skill]:
     Returns:
         List of Skill objects
     """
-    return _skill_registries.get(agent, [])
+    return extract_skills(agent)
 
 def extract_skills(agent_obj: Any) -> List[Skill]:
     """
     Extract skills from an agent object
     
-    This function first checks if the agent has registered skills.
-    If not, it tries to extract skills from the agent's functions
-    and registers them automatically.
+    Skills are read from the metadata the skill decorator attaches to
+    each of the agent's functions. There is no process-wide registry, so
+    agents served from the same process never see each other's skills.
     
     Args:
         agent_obj: The agent object
@@ -110,34 +97,35 @@ def extract_skills(agent_obj: Any) -> List[Skill]:
     Returns:
         List of Skill objects
     """
-    # First check the registry
-    skills = skills_for_agent(agent_obj)
-    if skills:
-        return skills
-        
-    # If no skills are registered, try to extract them from functions
-    functions = extract_functions(agent_obj)
+    return skills_from_functions(extract_functions(agent_obj))
+
+def skills_from_functions(functions: Iterable[Callable]) -> List[Skill]:
+    """
+    Collect the skills declared on already extracted agent functions
     
-    # Register skills if found
+    Args:
+        functions: Functions returned by extract_functions
+        
+    Returns:
+        List of Skill objects
+    """
+    skills = []
     for fn in functions:
-        if hasattr(fn, "_a2a_skills"):
-            for skill_def in fn._a2a_skills:
-                register_skill_for_agent(agent_obj, fn)
-                
-    # Return skills from registry after registration
-    return skills_for_agent(agent_obj)
+        skills.extend(getattr(fn, "_a2a_skills", []))
+    return skills
 
-def extract_functions(agent_obj: Any) -> List[Callable]:
+def extract_functions(agent_obj: Any) -> Tuple[Callable, ...]:
     """
     Extract functions from an agent object
     
-    This function tries to extract functions from common agent frameworks
+    This function tries to extract functions from common agent frameworks.
+    The result is a tuple so it can be computed once and shared.
     
     Args:
         agent_obj: The agent object
         
     Returns:
-        List of functions
+        Tuple of functions
     """
     funcs = []
     
@@ -155,4 +143,4 @@ def extract_functions(agent_obj: Any) -> List[Callable]:
             elif hasattr(t, "fn"):
                 funcs.append(t.fn)
     
-    return funcs
\ No newline at end of file
+    return tuple(funcs)
\ No newline at end of file
@@ -1,44 +1,195 @@
 """
 Agent card repository
 """
-from sqlalchemy import create_engine, select
+from sqlalchemy import create_engine, select, lambda_stmt, and_, or_, func, table, column
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from ..card import AgentCard, AgentCardData, Base
-from typing import Optional, List, Dict, Any
+from sqlalchemy.pool import StaticPool
+from ..card import AgentCard, AgentCardData, Base, skills_tsvector
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime
+import base64
 import os
+import orjson
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///dev.db")
-engine = create_engine(DATABASE_URL, echo=False, future=True)
+_url = make_url(DATABASE_URL)
+if _url.get_backend_name() == "sqlite" and _url.database in (None, "", ":memory:"):
+    # Every connection to an in-memory SQLite URL opens its own empty
+    # database. Searches run in worker threads, so share one connection
+    # across threads to keep them on the same database.
+    _POOL_OPTIONS = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+elif _url.get_backend_name() == "sqlite":
+    _POOL_OPTIONS = {}  # SQLite uses its own pooling
+else:
+    # Connection pool sizing for server databases
+    _POOL_OPTIONS = {"pool_size": 20, "max_overflow": 40}
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    future=True,
+    pool_pre_ping=True,
+    # Card JSON is (de)serialized on every upsert and search
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+    **_POOL_OPTIONS
+)
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, future=True)
-Base.metadata.create_all(engine)
+
+def _create_schema() -> None:
+    """
+    Create the tables that don't exist yet
+    
+    Several workers may import this module at once against a fresh
+    database. A worker that loses the race to create a table retries once,
+    and the retry finds the table in place.
+    """
+    try:
+        Base.metadata.create_all(engine, checkfirst=True)
+    except (OperationalError, ProgrammingError, IntegrityError):
+        Base.metadata.create_all(engine, checkfirst=True)
+
+_create_schema()
+
+# SQLite full-text index over skill names, kept in sync with agent_cards by
+# triggers (PostgreSQL uses the GIN index declared on AgentCard instead). The
+# trigram tokenizer lets LIKE '%...%' use the index, so skill search keeps
+# matching any substring of a name, e.g. "catalog" in "searchCatalog". Rows
+# are keyed by the card id: agent_cards has no declared integer key, and
+# VACUUM may renumber its implicit rowids.
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS agent_cards_fts USING fts5("
+    "id UNINDEXED, skills_text, tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS agent_cards_fts_ai AFTER INSERT ON agent_cards BEGIN "
+    "INSERT INTO agent_cards_fts(id, skills_text) VALUES (new.id, new.skills_text); END",
+    "CREATE TRIGGER IF NOT EXISTS agent_cards_fts_ad AFTER DELETE ON agent_cards BEGIN "
+    "DELETE FROM agent_cards_fts WHERE id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS agent_cards_fts_au AFTER UPDATE ON agent_cards BEGIN "
+    "DELETE FROM agent_cards_fts WHERE id = old.id; "
+    "INSERT INTO agent_cards_fts(id, skills_text) VALUES (new.id, new.skills_text); END",
+    # Index cards stored before the index existed
+    "INSERT INTO agent_cards_fts(id, skills_text) SELECT id, skills_text FROM agent_cards "
+    "WHERE id NOT IN (SELECT id FROM agent_cards_fts)",
+)
+# Objects of the earlier rowid-keyed index, dropped when it is found
+_SQLITE_FTS_LEGACY_DDL = (
+    "DROP TRIGGER IF EXISTS agent_cards_fts_ai",
+    "DROP TRIGGER IF EXISTS agent_cards_fts_ad",
+    "DROP TRIGGER IF EXISTS agent_cards_fts_au",
+    "DROP TABLE IF EXISTS agent_cards_fts",
+)
+agent_cards_fts = table("agent_cards_fts", column("id"), column("skills_text"))
+
+def _create_sqlite_fts() -> bool:
+    """
+    Create the SQLite full-text index if it does not exist yet
+    
+    An index created for an existing database is populated from the
+    agent_cards table.
+    
+    Returns:
+        True if the index is available, False if SQLite lacks FTS5 or its
+        trigram tokenizer
+        
+    Raises:
+        OperationalError: If creating the index fails for any other reason
+    """
+    with engine.begin() as conn:
+        existing = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'agent_cards_fts'"
+        ).scalar()
+        if existing is not None and "trigram" not in existing:
+            for ddl in _SQLITE_FTS_LEGACY_DDL:
+                conn.exec_driver_sql(ddl)
+        try:
+            for ddl in _SQLITE_FTS_DDL:
+                conn.exec_driver_sql(ddl)
+        except OperationalError as e:
+            message = str(e.orig)
+            if message.startswith(("no such module: fts5", "no such tokenizer: trigram")):
+                return False
+            raise
+    return True
+
+USE_SQLITE_FTS = engine.dialect.name == "sqlite" and _create_sqlite_fts()
+
+def encode_cursor(card: Any) -> str:
+    """
+    Encode the keyset pagination cursor pointing after an agent card
+    
+    Args:
+        card: The last agent card (or result row with its updated_at and
+            id) of a page
+        
+    Returns:
+        Opaque cursor string
+    """
+    key = f"{card.updated_at.isoformat()}|{card.id}"
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a keyset pagination cursor
+    
+    Args:
+        cursor: Cursor returned by a previous search
+        
+    Returns:
+        The (updated_at, id) key of the last card of the previous page
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        updated_at, card_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(updated_at), card_id
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
 
 class AgentCardRepo:
-    """Repository for agent cards"""
+    """
+    Repository for agent cards
+    
+    Every operation runs in its own short-lived session checked out from the
+    connection pool, so a repository can be shared by concurrent requests.
+    """
     
-    def __init__(self):
-        self.db = SessionLocal()
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
 
     def upsert(self, card: AgentCard) -> None:
         """
         Insert or update an agent card
         
+        Safe to call from several processes at once: if another process
+        inserts the same card first, the card is updated instead.
+        
         Args:
             card: The agent card to insert or update
         """
-        existing = self.db.get(AgentCard, card.id)
-        if existing:
+        with self.session_factory() as db:
+            existing = db.get(AgentCard, card.id)
+            if existing is None:
+                db.add(card)
+                try:
+                    db.commit()
+                    return
+                except IntegrityError:
+                    # Lost the insert race; update the winner's row
+                    db.rollback()
+                    existing = db.get(AgentCard, card.id)
             existing.card = card.card
             existing.version = card.version
             existing.skills_text = card.skills_text
-        else:
-            self.db.add(card)
-        self.db.commit()
+            db.commit()
 
     def search(self, *, 
                skill: Optional[str] = None, 
                domain: Optional[str] = None,
                limit: Optional[int] = None,
-               offset: Optional[int] = None) -> List[Dict[str, Any]]:
+               offset: Optional[int] = None,
+               after: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Search for agent cards by skill or domain with pagination
         
@@ -47,26 +198,91 @@ class AgentCardRepo:
             domain: Optional domain to search for
             limit: Maximum number of results to return (pagination)
             offset: Number of results to skip (pagination)
+            after: Cursor of the previous page (keyset pagination)
             
         Returns:
             List of matching agent cards
         """
-        stmt = select(AgentCard)
+        return self.search_page(
+            skill=skill, domain=domain, limit=limit, offset=offset, after=after
+        )["items"]
+
+    def search_page(self, *, 
+                    skill: Optional[str] = None, 
+                    domain: Optional[str] = None,
+                    limit: Optional[int] = None,
+                    offset: Optional[int] = None,
+                    after: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search for agent cards and return a page with its continuation cursor
+        
+        Prefer the `after` cursor over `offset` to page through results: it
+        seeks directly to the next page instead of skipping rows.
+        
+        Args:
+            skill: Optional skill name to search for
+            domain: Optional domain to search for
+            limit: Maximum number of results to return (pagination)
+            offset: Number of results to skip (pagination)
+            after: Cursor of the previous page (keyset pagination)
+            
+        Returns:
+            Dict with the matching agent cards under "items" and the cursor
+            of the next page under "next" (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        # Built as a lambda statement so that SQLAlchemy caches the statement
+        # construction as well as its compiled SQL; closure values become
+        # bound parameters. Only the columns the page needs are selected, so
+        # rows come back as plain tuples rather than ORM instances
+        stmt = lambda_stmt(lambda: select(AgentCard.card, AgentCard.updated_at, AgentCard.id))
         
         # Apply filters
         if skill:
-            stmt = stmt.where(AgentCard.skills_text.ilike(f"%{skill}%"))
+            if engine.dialect.name == "postgresql":
+                # Matches the GIN index on the skills tsvector
+                stmt += lambda s: s.where(skills_tsvector.op("@@")(func.plainto_tsquery("english", skill)))
+            elif USE_SQLITE_FTS:
+                # Substring match through the trigram index; SQLite's LIKE is
+                # case-insensitive for ASCII, as ILIKE is
+                skill_pattern = f"%{skill}%"
+                stmt += lambda s: s.where(AgentCard.id.in_(
+                    select(agent_cards_fts.c.id).where(agent_cards_fts.c.skills_text.like(skill_pattern))
+                ))
+            else:
+                skill_pattern = f"%{skill}%"
+                stmt += lambda s: s.where(AgentCard.skills_text.ilike(skill_pattern))
         # domain filter could inspect JSON_b but SQLite lacks -> simple string contains
         if domain:
-            stmt = stmt.where(AgentCard.card["extra"].as_string().ilike(f"%{domain}%"))
+            domain_pattern = f"%{domain}%"
+            stmt += lambda s: s.where(AgentCard.card["extra"].as_string().ilike(domain_pattern))
+        
+        # Seek past the last card of the previous page
+        if after:
+            updated_at, card_id = decode_cursor(after)
+            stmt += lambda s: s.where(or_(
+                AgentCard.updated_at < updated_at,
+                and_(AgentCard.updated_at == updated_at, AgentCard.id < card_id)
+            ))
             
-        # Order by most recent updates
-        stmt = stmt.order_by(AgentCard.updated_at.desc())
+        # Order by most recent updates; the id makes the order total
+        stmt += lambda s: s.order_by(AgentCard.updated_at.desc(), AgentCard.id.desc())
         
-        # Apply pagination
+        # Apply pagination; one extra row tells whether a next page exists
         if offset is not None:
-            stmt = stmt.offset(offset)
+            stmt += lambda s: s.offset(offset)
         if limit is not None:
-            stmt = stmt.limit(limit)
-            
-        return [row.to_dict() for row in self.db.execute(stmt).scalars()]
\ No newline at end of file
+            fetch_limit = limit + 1
+            stmt += lambda s: s.limit(fetch_limit)
+        
+        with self.session_factory() as db:
+            rows = db.execute(stmt).all()
+            more = limit is not None and len(rows) > limit
+            if more:
+                rows = rows[:limit]
+            return {
+                "items": [row.card for row in rows],
+                "next": encode_cursor(rows[-1]) if more and rows else None
+            }
@@ -0,0 +1,62 @@
+"""
+Agent loading for A2A Adapter
+
+Loads the agent object from a Python file. Used by the CLI and by the ASGI
+entrypoint, so it only depends on the standard library.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Optional
+
+def load_agent_module(module_path: str, agent_name: Optional[str] = None):
+    """
+    Load an agent module from a Python file
+    
+    Args:
+        module_path: Path to Python file
+        agent_name: Name of agent variable in the module
+        
+    Returns:
+        Loaded agent object
+        
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ImportError: If the file cannot be loaded as a module
+        LookupError: If no agent is found in the module
+    """
+    path = Path(module_path).resolve()
+    
+    if not path.exists():
+        raise FileNotFoundError(f"File {path} does not exist")
+    
+    # Load module, reusing it if this file was already loaded in this process
+    module = sys.modules.get("agent_module")
+    if module is None or getattr(module, "__file__", None) != str(path):
+        spec = importlib.util.spec_from_file_location("agent_module", path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"Could not load module from {path}")
+            
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["agent_module"] = module
+        spec.loader.exec_module(module)
+    
+    # Find agent object
+    if agent_name:
+        if not hasattr(module, agent_name):
+            raise LookupError(f"Agent '{agent_name}' not found in {path}")
+        return getattr(module, agent_name)
+    
+    # Try to find agent by common names
+    for name in ["agent", "Agent", "AGENT"]:
+        if hasattr(module, name):
+            return getattr(module, name)
+    
+    # Look for any object with tasks attribute, in definition order
+    for name, obj in vars(module).items():
+        if name.startswith("_"):
+            continue
+        if hasattr(obj, "tasks") and callable(getattr(obj.tasks, "__iter__", None)):
+            return obj
+    
+    raise LookupError(f"Could not find agent in {path}. Please specify agent name with --agent")
@@ -3,21 +3,35 @@ Server module for A2A Adapter
 
 This module provides functions for building and running the A2A adapter server.
 """
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence, Union
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from .card import AgentCardData, AgentCard, Skill
-from .core.skills import extract_skills
+from .core.skills import extract_functions, skills_from_functions
 from .db.registry import AgentCardRepo
 from .api.card_routes import create_card_router
 from .api.task_routes import create_task_router
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Release the skill thread pool when the app shuts down"""
+    try:
+        yield
+    finally:
+        if app.state.executor is not None:
+            app.state.executor.shutdown(wait=False)
+
 def build_app(agent_obj: Any, *, 
               host: str = "127.0.0.1", 
               port: int = 8080,
-              card_data: Optional[AgentCardData] = None) -> FastAPI:
+              card_data: Optional[AgentCardData] = None,
+              max_workers: Optional[int] = None,
+              cors_origins: Optional[Sequence[str]] = None) -> FastAPI:
     """
     Build a FastAPI application for an agent
     
@@ -26,6 +40,10 @@ def build_app(agent_obj: Any, *,
         host: Host to bind the server to
         port: Port to bind the server to
         card_data: Optional pre-populated agent card data
+        max_workers: Size of the thread pool running sync skills
+            (default: the event loop's default executor)
+        cors_origins: Origins allowed to make cross-origin requests
+            (default: any origin)
         
     Returns:
         FastAPI application
@@ -34,22 +52,35 @@ def build_app(agent_obj: Any, *,
     app = FastAPI(
         title=agent_obj.name,
         description=getattr(agent_obj, "description", ""),
-        version=getattr(agent_obj, "version", "0.0.1")
+        version=getattr(agent_obj, "version", "0.0.1"),
+        lifespan=_lifespan
+    )
+    
+    # Thread pool for sync skill functions
+    app.state.executor = (
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="a2a-skill")
+        if max_workers else None
     )
     
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
+        allow_origins=list(cors_origins) if cors_origins is not None else ["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
     )
     
+    # Agent card repository shared by the whole app
+    repo = AgentCardRepo()
+    
+    # Walk the agent's functions once; skills and dispatch are built from them
+    functions = extract_functions(agent_obj)
+    
     # Generate or use agent card data
     if card_data is None:
         # Extract skills
-        skills = extract_skills(agent_obj)
+        skills = skills_from_functions(functions)
         
         # Generate base URL
         base_url = f"http://{host}:{port}"
@@ -73,16 +104,46 @@ def build_app(agent_obj: Any, *,
             extra={"framework": agent_obj.__class__.__module__}
         )
         
-        # Save card to repository
-        repo = AgentCardRepo()
-        repo.upsert(AgentCard.from_data(card_data))
+        # Save card to repository; the row and /agentCard share one card dict
+        card_dict = card_data.to_dict()
+        repo.upsert(AgentCard.from_data(card_data, card_dict))
+    else:
+        card_dict = card_data.to_dict()
+    
+    # Keep the card for callers that report on the app, e.g. the CLI
+    app.state.card_data = card_data
+    app.state.card_dict = card_dict
     
     # Register routes
-    app.include_router(create_card_router(card_data))
-    app.include_router(create_task_router(agent_obj))
+    app.include_router(create_card_router(card_dict, repo))
+    app.include_router(create_task_router(agent_obj, functions))
     
     return app
 
+def serve(app: Union[FastAPI, str], *,
+          host: str = "127.0.0.1",
+          port: int = 8080,
+          workers: Optional[int] = None,
+          log_level: str = "info") -> None:
+    """
+    Run an A2A adapter app with uvicorn
+    
+    Args:
+        app: The FastAPI app, or an import string such as "a2a_adapter.asgi:app"
+        host: Host to bind the server to
+        port: Port to bind the server to
+        workers: Number of worker processes (default: $WEB_CONCURRENCY or 1)
+        log_level: Logging level
+    """
+    workers = workers or int(os.environ.get("WEB_CONCURRENCY", 1))
+    if workers > 1 and not isinstance(app, str):
+        raise ValueError(
+            "Running multiple workers requires an import string, "
+            "e.g. serve('a2a_adapter.asgi:app', workers=4)"
+        )
+    
+    uvicorn.run(app, host=host, port=port, workers=workers, log_level=log_level)
+
 def register_agent(agent_obj: Any, *, 
                    host: str = "127.0.0.1", 
                    port: int = 8080, 
@@ -90,6 +151,10 @@ def register_agent(agent_obj: Any, *,
     """
     Register an agent and start the API server
     
+    This is a convenience wrapper around build_app and serve that runs a
+    single worker. Use build_app directly to hand the app to a process
+    manager.
+    
     Args:
         agent_obj: The agent object with skills
         host: Host to bind the server to
@@ -107,7 +172,7 @@ def register_agent(agent_obj: Any, *,
         return app
     
     # Start server
-    uvicorn.run(app, host=host, port=port, log_level="info")
+    serve(app, host=host, port=port, workers=1)
     
     # This line is never reached during normal operation
-    return app
\ No newline at end of file
+    return app
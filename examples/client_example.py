@@ -7,31 +7,123 @@ This script demonstrates how to interact with an A2A-compatible agent service.
 
 import asyncio
 import httpx
-import json
+import orjson
+import re
 import sys
 import uuid
 from pprint import pprint
-from urllib.parse import urljoin
 import time
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Union, AsyncIterator, Tuple
+
+# Blank line ending an SSE frame
+_SSE_FRAME_END = re.compile(rb"\r?\n\r?\n")
+# Event type and data fields of an SSE frame; comment lines don't match
+_SSE_FIELD = re.compile(rb"^(event|data):[ ]?(.*?)\r?$", re.MULTILINE)
+
+def _try_json(data: bytes) -> Any:
+    """
+    Decode event data as JSON
+    
+    Args:
+        data: The event data
+        
+    Returns:
+        The decoded data, or the data as text if it is not valid JSON
+    """
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return data.decode("utf-8", "replace")
+
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Split a streamed SSE response into events
+    
+    The raw bytes are framed on blank lines and each frame's fields are
+    read with one regex scan, without decoding the stream line by line.
+    
+    Args:
+        response: The streamed response
+        
+    Yields:
+        (event type, data) of every event that has both
+    """
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        start = 0
+        for frame_end in _SSE_FRAME_END.finditer(buffer):
+            event_type = None
+            data = []
+            for field, value in _SSE_FIELD.findall(buffer, start, frame_end.start()):
+                if field == b"event":
+                    event_type = value
+                else:
+                    data.append(value)
+            if event_type and data:
+                yield event_type.decode(), b"\n".join(data)
+            start = frame_end.end()
+        del buffer[:start]
+
+# Request bodies are encoded with orjson and sent as raw content
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Keep-alive pool shared by every call a client makes
+CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+# Event streams stay open until the task finishes, so reads are unbounded
+CLIENT_TIMEOUT = httpx.Timeout(10.0, read=None)
 
 class A2AClient:
-    """Client for interacting with A2A-compatible agents"""
+    """
+    Client for interacting with A2A-compatible agents
+    
+    All calls share one httpx.AsyncClient, so consecutive requests reuse
+    keep-alive connections instead of opening a new one each time. With
+    HTTP/2, concurrent calls are multiplexed over a single connection.
+    """
     
-    def __init__(self, base_url: str = "http://localhost:8080"):
+    # Fixed part of each JSON-RPC request; calls only add the id and params
+    _TASKS_SEND = {"jsonrpc": "2.0", "method": "tasks/send"}
+    _SKILLS_SEARCH = {"jsonrpc": "2.0", "method": "skills/search"}
+    
+    def __init__(self, base_url: str = "http://localhost:8080", http2: bool = False,
+                 cache_ttl: float = 5.0):
         """
         Initialize the client
         
         Args:
             base_url: Base URL of the A2A-compatible service
+            http2: Negotiate HTTP/2 with the service. This requires the h2
+                package (pip install "httpx[http2]") and an https:// base
+                URL, as HTTP/2 is negotiated during the TLS handshake
+            cache_ttl: Seconds a search result is reused for identical
+                searches (0 disables the cache)
         """
         self.base_url = base_url
-        self.httpx_client = httpx.AsyncClient()
+        self.cache_ttl = cache_ttl
+        # Maps (query, domain) to (monotonic time fetched, encoded agents),
+        # oldest first. Results are kept encoded so every caller decodes its
+        # own copy and cannot change what later callers get.
+        self._search_cache: Dict[Tuple[str, Optional[str]], Tuple[float, bytes]] = {}
+        self.httpx_client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            timeout=CLIENT_TIMEOUT,
+            limits=CLIENT_LIMITS
+        )
     
     async def close(self):
         """Close the HTTP client"""
         await self.httpx_client.aclose()
     
+    async def __aenter__(self) -> "A2AClient":
+        """Use the client as an async context manager"""
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the HTTP client on exit"""
+        await self.close()
+    
     async def get_agent_card(self) -> Dict[str, Any]:
         """
         Get the agent card
@@ -39,9 +131,9 @@ class A2AClient:
         Returns:
             Agent card data
         """
-        response = await self.httpx_client.get(urljoin(self.base_url, "/agentCard"))
+        response = await self.httpx_client.get("/agentCard")
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
     
     async def send_task(self, skill_name: str, input_data: Union[str, Dict[str, Any]]) -> str:
         """
@@ -54,30 +146,81 @@ class A2AClient:
         Returns:
             Task ID
         """
-        request_id = str(uuid.uuid4())
+        response = await self.httpx_client.post(
+            "/tasks/send",
+            content=orjson.dumps(self._send_payload(skill_name, input_data)),
+            headers=JSON_HEADERS
+        )
+        
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+        
+        if "error" in result:
+            raise RuntimeError(f"Error: {result['error']['message']}")
+            
+        return result["result"]["taskId"]
+    
+    def _send_payload(self, skill_name: str, input_data: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build a tasks/send request
         
-        payload = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "method": "tasks/send",
+        Args:
+            skill_name: Name of the skill to execute
+            input_data: Input data for the skill
+            
+        Returns:
+            JSON-RPC request payload
+        """
+        return {
+            **self._TASKS_SEND,
+            "id": uuid.uuid4().hex,
             "params": {
                 "agentSkill": skill_name,
                 "input": input_data
             }
         }
+    
+    async def stream_task(self, skill_name: str, input_data: Union[str, Dict[str, Any]]):
+        """
+        Send a task and stream its events on the same request
         
-        response = await self.httpx_client.post(
-            urljoin(self.base_url, "/tasks/send"),
-            json=payload
-        )
+        The task is sent with ?stream=true, so its events arrive on the
+        tasks/send response, one round trip earlier than with a separate
+        events request. If the server answers with a plain task ID instead,
+        the events are fetched with get_task_events.
         
-        response.raise_for_status()
-        result = response.json()
+        Args:
+            skill_name: Name of the skill to execute
+            input_data: Input data for the skill
+            
+        Yields:
+            Event data
+        """
+        async with self.httpx_client.stream(
+            "POST",
+            "/tasks/send",
+            params={"stream": "true"},
+            content=orjson.dumps(self._send_payload(skill_name, input_data)),
+            headers=JSON_HEADERS
+        ) as response:
+            response.raise_for_status()
+            
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                async for event_type, data in iter_sse_events(response):
+                    yield {"type": event_type, "data": _try_json(data)}
+                    
+                    # If event is completed or failed, stop streaming
+                    if event_type in ("completed", "failed"):
+                        break
+                return
+            
+            result = _try_json(await response.aread())
         
         if "error" in result:
             raise RuntimeError(f"Error: {result['error']['message']}")
-            
-        return result["result"]["taskId"]
+        
+        async for event in self.get_task_events(result["result"]["taskId"]):
+            yield event
     
     async def get_task_events(self, task_id: str):
         """
@@ -89,42 +232,24 @@ class A2AClient:
         Yields:
             Event data
         """
-        events_url = urljoin(self.base_url, f"/tasks/{task_id}/events")
-        
         # Stream response
-        async with self.httpx_client.stream("GET", events_url) as response:
+        async with self.httpx_client.stream("GET", f"/tasks/{task_id}/events") as response:
             response.raise_for_status()
             
-            async for line in response.aiter_lines():
-                if not line.strip() or not line.startswith("event:"):
-                    continue
-                
-                # Parse SSE message
-                event_type = None
-                event_data = None
+            async for event_type, data in iter_sse_events(response):
+                yield {"type": event_type, "data": _try_json(data)}
                 
-                # Parse SSE format (event: xxx\ndata: xxx)
-                parts = line.split("\n")
-                for part in parts:
-                    if part.startswith("event:"):
-                        event_type = part[6:].strip()
-                    elif part.startswith("data:"):
-                        try:
-                            event_data = json.loads(part[5:].strip())
-                        except:
-                            event_data = part[5:].strip()
-                
-                if event_type and event_data:
-                    yield {"type": event_type, "data": event_data}
-                    
-                    # If event is completed or failed, stop streaming
-                    if event_type in ["completed", "failed"]:
-                        break
+                # If event is completed or failed, stop streaming
+                if event_type in ("completed", "failed"):
+                    break
     
     async def search_skills(self, query: str = "", domain: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Search for skills
         
+        Identical searches within cache_ttl seconds are answered from the
+        previous result without a request.
+        
         Args:
             query: Search query
             domain: Domain to filter by
@@ -132,31 +257,42 @@ class A2AClient:
         Returns:
             List of matching agent cards
         """
-        request_id = str(uuid.uuid4())
+        # Drop expired results, oldest first
+        now = time.monotonic()
+        while self._search_cache:
+            oldest = next(iter(self._search_cache))
+            if now - self._search_cache[oldest][0] < self.cache_ttl:
+                break
+            del self._search_cache[oldest]
+        
+        # Reuse a recent result of the same search
+        key = (query, domain)
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return orjson.loads(cached[1])
         
         params = {"query": query}
         if domain:
             params["domain"] = domain
             
-        payload = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "method": "skills/search",
-            "params": params
-        }
+        payload = {**self._SKILLS_SEARCH, "id": uuid.uuid4().hex, "params": params}
         
         response = await self.httpx_client.post(
-            urljoin(self.base_url, "/search"),
-            json=payload
+            "/search",
+            content=orjson.dumps(payload),
+            headers=JSON_HEADERS
         )
         
         response.raise_for_status()
-        result = response.json()
+        result = orjson.loads(response.content)
         
         if "error" in result:
             raise RuntimeError(f"Error: {result['error']['message']}")
-            
-        return result["result"]["agents"]
+        
+        agents = result["result"]["agents"]
+        if self.cache_ttl > 0:
+            self._search_cache[key] = (time.monotonic(), orjson.dumps(agents))
+        return agents
         
     async def execute_skill(self, skill_name: str, input_data: Union[str, Dict[str, Any]]) -> Any:
         """
@@ -169,11 +305,8 @@ class A2AClient:
         Returns:
             Skill execution result
         """
-        # Send task
-        task_id = await self.send_task(skill_name, input_data)
-        
-        # Wait for result
-        async for event in self.get_task_events(task_id):
+        # Send task and wait for result
+        async for event in self.stream_task(skill_name, input_data):
             if event["type"] == "completed":
                 if "result" in event["data"] and "data" in event["data"]["result"]:
                     return event["data"]["result"]["data"]
@@ -195,9 +328,7 @@ async def main():
     if len(sys.argv) > 1:
         base_url = sys.argv[1]
         
-    client = A2AClient(base_url)
-    
-    try:
+    async with A2AClient(base_url) as client:
         # Get agent card
         print("\nGetting agent card...")
         card = await client.get_agent_card()
@@ -254,9 +385,12 @@ async def main():
             elif event_type == "failed" and "error" in event_data:
                 print("Error:")
                 pprint(event_data["error"])
-    finally:
-        # Close client
-        await client.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # Drive the script with uvloop's faster event loop when it is installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
\ No newline at end of file
@@ -9,197 +9,226 @@ It performs the following tests:
 3. Receive task events
 4. Test error handling
 5. Test JSON-RPC compliance
+
+Pass the server URL as the first argument (default: http://localhost:8080),
+or asgi:path/to/agent.py to check an agent file in-process.
 """
 
 import httpx
 import asyncio
-import json
+import orjson
 import sys
 import uuid
 import time
 from pprint import pprint
-from urllib.parse import urljoin
 from typing import Dict, Any, List, Optional
 
+from client_example import iter_sse_events, CLIENT_LIMITS, JSON_HEADERS
+
 BASE_URL = "http://localhost:8080"
+# Prefix of a BASE_URL naming an agent file to check in-process
+# (e.g. asgi:examples/crewai_catalog.py) instead of a running server
+ASGI_PREFIX = "asgi:"
+
+# Pre-encoded probe requests; only the JSON-encoded id (and skill) vary
+TASK_SEND_TEMPLATE = (
+    b'{"jsonrpc":"2.0","id":%s,"method":"tasks/send",'
+    b'"params":{"agentSkill":%s,"input":"test query"}}'
+)
+SEARCH_TEMPLATE = b'{"jsonrpc":"2.0","id":%s,"method":"skills/search","params":{"query":""}}'
+
+# Fields every agent card and every skill must have
+REQUIRED_CARD_FIELDS = frozenset([
+    "id", "name", "version", "description", "skills", 
+    "url", "endpoints", "capabilities", "authentication",
+    "defaultInputModes", "defaultOutputModes"
+])
+REQUIRED_SKILL_FIELDS = frozenset(["name", "description", "inputTypes", "outputTypes"])
+
+def check_fields(obj: Dict[str, Any], required: frozenset) -> None:
+    """Print which required fields an object has and which are missing"""
+    keys = obj.keys()
+    for field in sorted(required & keys):
+        print(f"✓ {field}")
+    for field in sorted(required - keys):
+        print(f"✗ {field} - MISSING")
 
-async def test_agent_card():
+def make_client() -> httpx.AsyncClient:
+    """
+    Create the client shared by every probe
+    
+    For an asgi: BASE_URL, the agent file is loaded as the CLI loads it and
+    its app is called in-process through httpx's ASGI transport, without sockets.
+    """
+    if BASE_URL.startswith(ASGI_PREFIX):
+        from a2a_adapter import build_app
+        from a2a_adapter.loader import load_agent_module
+        agent = load_agent_module(BASE_URL[len(ASGI_PREFIX):], None)
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=build_app(agent)),
+            base_url="http://asgi",
+            timeout=20.0
+        )
+    return httpx.AsyncClient(base_url=BASE_URL, timeout=20.0, limits=CLIENT_LIMITS)
+
+async def test_agent_card(client: httpx.AsyncClient):
     """Test retrieving the agent card"""
     print("\n=== Testing Agent Card ===")
-    async with httpx.AsyncClient() as client:
-        response = await client.get(urljoin(BASE_URL, "/agentCard"))
-        print(f"Status: {response.status_code}")
+    response = await client.get("/agentCard")
+    print(f"Status: {response.status_code}")
         
-        if response.status_code == 200:
-            card = response.json()
-            print("Agent Card Fields:")
-            
-            # Check required fields
-            required_fields = [
-                "id", "name", "version", "description", "skills", 
-                "url", "endpoints", "capabilities", "authentication",
-                "defaultInputModes", "defaultOutputModes"
-            ]
+    if response.status_code == 200:
+        card = orjson.loads(response.content)
+        print("Agent Card Fields:")
             
-            for field in required_fields:
-                if field in card:
-                    print(f"✓ {field}")
-                else:
-                    print(f"✗ {field} - MISSING")
+        # Check required fields
+        check_fields(card, REQUIRED_CARD_FIELDS)
             
-            # Check skills structure
-            if "skills" in card and card["skills"]:
-                skill = card["skills"][0]
-                print("\nSkill Fields:")
-                skill_fields = ["name", "description", "inputTypes", "outputTypes"]
-                for field in skill_fields:
-                    if field in skill:
-                        print(f"✓ {field}")
-                    else:
-                        print(f"✗ {field} - MISSING")
+        # Check skills structure
+        if "skills" in card and card["skills"]:
+            print("\nSkill Fields:")
+            check_fields(card["skills"][0], REQUIRED_SKILL_FIELDS)
             
-            return card
-        else:
-            print(f"Error: {response.text}")
-            return None
+        return card
+    else:
+        print(f"Error: {response.text}")
+        return None
 
-async def test_task_send(skill_name: str):
+async def test_task_send(client: httpx.AsyncClient, skill_name: str):
     """Test sending a task using JSON-RPC format"""
     print("\n=== Testing Task Send (JSON-RPC) ===")
-    request_id = str(uuid.uuid4())
-    
-    payload = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tasks/send",
-        "params": {
-            "agentSkill": skill_name,
-            "input": "test query"
-        }
-    }
+    request_id = uuid.uuid4().hex
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            urljoin(BASE_URL, "/tasks/send"),
-            json=payload
-        )
+    response = await client.post(
+        "/tasks/send",
+        content=TASK_SEND_TEMPLATE % (orjson.dumps(request_id), orjson.dumps(skill_name)),
+        headers=JSON_HEADERS
+    )
         
-        print(f"Status: {response.status_code}")
-        if response.status_code == 202:
-            result = response.json()
-            print("Response:")
-            pprint(result)
+    print(f"Status: {response.status_code}")
+    if response.status_code == 202:
+        result = orjson.loads(response.content)
+        print("Response:")
+        pprint(result)
             
-            # Validate JSON-RPC response
-            if "jsonrpc" in result and result["jsonrpc"] == "2.0":
-                print("✓ JSON-RPC 2.0 envelope")
-            else:
-                print("✗ Missing or incorrect JSON-RPC 2.0 envelope")
+        # Validate JSON-RPC response
+        if "jsonrpc" in result and result["jsonrpc"] == "2.0":
+            print("✓ JSON-RPC 2.0 envelope")
+        else:
+            print("✗ Missing or incorrect JSON-RPC 2.0 envelope")
                 
-            if "id" in result and result["id"] == request_id:
-                print("✓ Request ID echoed correctly")
-            else:
-                print("✗ Request ID not echoed correctly")
+        if "id" in result and result["id"] == request_id:
+            print("✓ Request ID echoed correctly")
+        else:
+            print("✗ Request ID not echoed correctly")
                 
-            if "result" in result and "taskId" in result["result"]:
-                print(f"✓ Task ID returned: {result['result']['taskId']}")
-                return result["result"]["taskId"]
-            else:
-                print("✗ No taskId in response")
-                return None
+        if "result" in result and "taskId" in result["result"]:
+            print(f"✓ Task ID returned: {result['result']['taskId']}")
+            return result["result"]["taskId"]
         else:
-            print(f"Error: {response.text}")
+            print("✗ No taskId in response")
             return None
+    else:
+        print(f"Error: {response.text}")
+        return None
 
-async def test_invalid_skill():
-    """Test error handling for invalid skill"""
-    print("\n=== Testing Invalid Skill Handling ===")
-    request_id = str(uuid.uuid4())
+async def test_error_handling(client: httpx.AsyncClient):
+    """Test error handling for an invalid skill and an unknown method"""
+    print("\n=== Testing Error Handling (JSON-RPC batch) ===")
     
-    payload = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tasks/send",
-        "params": {
-            "agentSkill": "nonExistentSkill",
-            "input": "test query"
+    # Both error probes travel in a single batched request
+    payload = [
+        {
+            "jsonrpc": "2.0",
+            "id": uuid.uuid4().hex,
+            "method": "tasks/send",
+            "params": {
+                "agentSkill": "nonExistentSkill",
+                "input": "test query"
+            }
+        },
+        {
+            "jsonrpc": "2.0",
+            "id": uuid.uuid4().hex,
+            "method": "tasks/unknownMethod",
+            "params": {
+                "agentSkill": "nonExistentSkill",
+                "input": "test query"
+            }
         }
-    }
+    ]
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            urljoin(BASE_URL, "/tasks/send"),
-            json=payload
-        )
+    response = await client.post(
+        "/tasks/send",
+        content=orjson.dumps(payload),
+        headers=JSON_HEADERS
+    )
+    
+    print(f"Status: {response.status_code}")
+    results = orjson.loads(response.content)
+    print("Response:")
+    pprint(results)
+    
+    if not isinstance(results, list) or len(results) != len(payload):
+        print("✗ Batch not answered with one response per request")
+        return False
+    
+    # Check error structure of each response
+    success = True
+    for request, result in zip(payload, results):
+        if "error" not in result:
+            print(f"✗ No error object in response to {request['method']}")
+            success = False
+            continue
         
-        print(f"Status: {response.status_code}")
-        result = response.json()
-        print("Response:")
-        pprint(result)
+        error = result["error"]
+        if "code" in error and isinstance(error["code"], int):
+            print(f"✓ Error code: {error['code']}")
+        else:
+            print("✗ Missing or invalid error code")
+            
+        if "message" in error and isinstance(error["message"], str):
+            print(f"✓ Error message: {error['message']}")
+        else:
+            print("✗ Missing or invalid error message")
         
-        # Check error structure
-        if "error" in result:
-            error = result["error"]
-            if "code" in error and isinstance(error["code"], int):
-                print(f"✓ Error code: {error['code']}")
-            else:
-                print("✗ Missing or invalid error code")
-                
-            if "message" in error and isinstance(error["message"], str):
-                print(f"✓ Error message: {error['message']}")
-            else:
-                print("✗ Missing or invalid error message")
-                
-            return True
+        if result.get("id") == request["id"]:
+            print("✓ Request ID echoed correctly")
         else:
-            print("✗ No error object in response")
-            return False
+            print("✗ Request ID not echoed correctly")
+    
+    return success
 
-async def test_task_events(task_id: str):
+async def test_task_events(client: httpx.AsyncClient, task_id: str):
     """Test the event stream for a task"""
     print(f"\n=== Testing Task Events Stream ===")
     print(f"Task ID: {task_id}")
     
-    events_url = urljoin(BASE_URL, f"/tasks/{task_id}/events")
-    print(f"Connecting to {events_url}")
+    events_path = f"/tasks/{task_id}/events"
+    if BASE_URL.startswith(ASGI_PREFIX):
+        print(f"Streaming {events_path} from {BASE_URL[len(ASGI_PREFIX):]}")
+    else:
+        print(f"Connecting to {BASE_URL}{events_path}")
     
     events_received = []
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            async with client.stream("GET", events_url) as response:
-                if response.status_code != 200:
-                    print(f"Error: {response.status_code} - {await response.text()}")
-                    return False
+        async with client.stream("GET", events_path) as response:
+            if response.status_code != 200:
+                print(f"Error: {response.status_code} - {(await response.aread()).decode()}")
+                return False
                 
-                async for line in response.aiter_lines():
-                    line = line.strip()
-                    if not line or line == ":" or not line.startswith("event:"):
-                        continue
-                    
-                    event_type = None
-                    event_data = None
-                    
-                    # Parse SSE format (event: xxx\ndata: xxx)
-                    parts = line.split("\n")
-                    for part in parts:
-                        if part.startswith("event:"):
-                            event_type = part[6:].strip()
-                        elif part.startswith("data:"):
-                            try:
-                                event_data = json.loads(part[5:].strip())
-                            except:
-                                event_data = part[5:].strip()
-                    
-                    if event_type:
-                        print(f"Event: {event_type}")
-                        if event_data:
-                            print(f"Data: {event_data}")
-                        
-                        events_received.append(event_type)
-                        
-                        # If we received the completed event, we're done
-                        if event_type in ["completed", "failed"]:
-                            break
+            async for event_type, data in iter_sse_events(response):
+                print(f"Event: {event_type}")
+                try:
+                    print(f"Data: {orjson.loads(data)}")
+                except orjson.JSONDecodeError:
+                    print(f"Data: {data.decode('utf-8', 'replace')}")
+                
+                events_received.append(event_type)
+                
+                # If we received the completed event, we're done
+                if event_type in ["completed", "failed"]:
+                    break
         
     except asyncio.TimeoutError:
         print("Error: Connection timed out")
@@ -232,93 +261,87 @@ async def test_task_events(task_id: str):
     
     return "completed" in events_received
 
-async def test_search():
+async def test_search(client: httpx.AsyncClient):
     """Test the search endpoint"""
     print("\n=== Testing Search Endpoint ===")
-    request_id = str(uuid.uuid4())
-    
-    payload = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "skills/search",
-        "params": {
-            "query": ""
-        }
-    }
+    request_id = uuid.uuid4().hex
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            urljoin(BASE_URL, "/search"),
-            json=payload
-        )
+    response = await client.post(
+        "/search",
+        content=SEARCH_TEMPLATE % orjson.dumps(request_id),
+        headers=JSON_HEADERS
+    )
         
-        print(f"Status: {response.status_code}")
-        if response.status_code == 200:
-            result = response.json()
-            print("Response:")
-            pprint(result)
+    print(f"Status: {response.status_code}")
+    if response.status_code == 200:
+        result = orjson.loads(response.content)
+        print("Response:")
+        pprint(result)
             
-            # Validate JSON-RPC response
-            if "jsonrpc" in result and result["jsonrpc"] == "2.0":
-                print("✓ JSON-RPC 2.0 envelope")
-            else:
-                print("✗ Missing or incorrect JSON-RPC 2.0 envelope")
+        # Validate JSON-RPC response
+        if "jsonrpc" in result and result["jsonrpc"] == "2.0":
+            print("✓ JSON-RPC 2.0 envelope")
+        else:
+            print("✗ Missing or incorrect JSON-RPC 2.0 envelope")
                 
-            if "id" in result and result["id"] == request_id:
-                print("✓ Request ID echoed correctly")
-            else:
-                print("✗ Request ID not echoed correctly")
+        if "id" in result and result["id"] == request_id:
+            print("✓ Request ID echoed correctly")
+        else:
+            print("✗ Request ID not echoed correctly")
                 
-            if "result" in result and "agents" in result["result"]:
-                print(f"✓ Agents returned: {len(result['result']['agents'])}")
-                return True
-            else:
-                print("✗ No agents in response")
-                return False
+        if "result" in result and "agents" in result["result"]:
+            print(f"✓ Agents returned: {len(result['result']['agents'])}")
+            return True
         else:
-            print(f"Error: {response.text}")
+            print("✗ No agents in response")
             return False
+    else:
+        print(f"Error: {response.text}")
+        return False
 
 async def main():
     print("A2A Protocol Compliance Test")
     print("===========================")
     
-    # Test 1: Get Agent Card
-    card = await test_agent_card()
-    if not card:
-        print("❌ Agent Card test failed")
-        return 1
-    
-    # Get the first skill name for testing
-    if "skills" in card and card["skills"]:
-        skill_name = card["skills"][0]["name"]
-    else:
-        print("❌ No skills found in agent card")
-        return 1
-    
-    # Test 2: Test error handling
-    error_success = await test_invalid_skill()
-    if not error_success:
-        print("❌ Error handling test failed")
-        return 1
-    
-    # Test 3: Send a task
-    task_id = await test_task_send(skill_name)
-    if not task_id:
-        print("❌ Task Send test failed")
-        return 1
-    
-    # Test 4: Receive task events
-    events_success = await test_task_events(task_id)
-    if not events_success:
-        print("❌ Task Events test failed")
-        return 1
-    
-    # Test 5: Search endpoint
-    search_success = await test_search()
-    if not search_success:
-        print("❌ Search test failed")
-        return 1
+    # One client for every probe, so requests reuse keep-alive connections
+    async with make_client() as client:
+        # Tests 1, 2 and 5: Get Agent Card, test error handling and the search
+        # endpoint; these probes are independent, so they run concurrently
+        card, error_success, search_success = await asyncio.gather(
+            test_agent_card(client),
+            test_error_handling(client),
+            test_search(client)
+        )
+        if not card:
+            print("❌ Agent Card test failed")
+            return 1
+        
+        # Get the first skill name for testing
+        if "skills" in card and card["skills"]:
+            skill_name = card["skills"][0]["name"]
+        else:
+            print("❌ No skills found in agent card")
+            return 1
+        
+        if not error_success:
+            print("❌ Error handling test failed")
+            return 1
+        
+        if not search_success:
+            print("❌ Search test failed")
+            return 1
+        
+        # Test 3: Send a task
+        task_id = await test_task_send(client, skill_name)
+        if not task_id:
+            print("❌ Task Send test failed")
+            return 1
+        
+        # Test 4: Receive task events
+        events_success = await test_task_events(client, task_id)
+        if not events_success:
+            print("❌ Task Events test failed")
+            return 1
     
     print("\n=== SUMMARY ===")
     print("✅ All tests passed! Your implementation is A2A-compatible.")
@@ -328,5 +351,11 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         BASE_URL = sys.argv[1]
     
-    exit_code = asyncio.run(main())
+    # Drive the script with uvloop's faster event loop when it is installed
+    try:
+        import uvloop
+    except ImportError:
+        exit_code = asyncio.run(main())
+    else:
+        exit_code = uvloop.run(main())
     sys.exit(exit_code)
\ No newline at end of file
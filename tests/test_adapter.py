@@ -2,7 +2,8 @@ import pytest
 from types import SimpleNamespace
 from a2a_adapter import skill, register_agent
 from a2a_adapter.core.skills import extract_skills
-from a2a_adapter.card import Skill
+from a2a_adapter.card import Skill, AgentCardData
+from dataclasses import asdict
 
 def test_skill_decorator():
     """Test the skill decorator correctly annotates functions"""
@@ -24,6 +25,33 @@ def test_skill_decorator():
     assert skill_def.inputTypes == ["text"]
     assert skill_def.outputTypes == ["json"]
     
+def test_skill_decorator_preserves_sync_and_async():
+    """Test the skill decorator keeps sync functions sync and async functions async"""
+    import inspect
+    
+    @skill(name="sync", inputTypes=["text"], outputTypes=["text"])
+    def sync_function(x):
+        return x
+        
+    @skill(name="async", inputTypes=["text"], outputTypes=["text"])
+    async def async_function(x):
+        return x
+        
+    assert sync_function("a") == "a"
+    assert sync_function._a2a_is_coro is False
+    assert inspect.iscoroutinefunction(async_function)
+    assert async_function._a2a_is_coro is True
+    
+def test_skill_returns_function_unwrapped():
+    """Test the skill decorator returns the decorated function itself"""
+    async def raw(x):
+        return x
+        
+    decorated = skill(name="raw", inputTypes=["text"], outputTypes=["text"])(raw)
+    
+    assert decorated is raw
+    assert decorated._a2a_skill == "raw"
+    
 def test_extract_skills():
     """Test extracting skills from an agent object"""
     @skill(name="skill1", inputTypes=["text"], outputTypes=["json"])
@@ -46,6 +74,20 @@ def test_extract_skills():
     assert "skill1" in skill_names
     assert "skill2" in skill_names
     
+def test_card_data_to_dict():
+    """Test the hand-built card dict matches the dataclass fields"""
+    card_data = AgentCardData(
+        id="urn:agent:test",
+        name="Test Agent",
+        version="0.1.0",
+        description="Agent for testing",
+        skills=[Skill(name="echo", description="Echo", inputTypes=["text"], outputTypes=["text"])],
+        url="http://127.0.0.1:8080",
+        endpoints={"tasks": "http://127.0.0.1:8080/tasks/send"}
+    )
+    
+    assert card_data.to_dict() == asdict(card_data)
+
 def test_register_agent_starts():
     """Test that register_agent creates a valid FastAPI app"""
     # Create a simple agent with a skill
@@ -67,4 +109,98 @@ def test_register_agent_starts():
     assert "/agentCard" in routes
     assert "/tasks/send" in routes
     assert "/tasks/{task_id}/events" in routes
-    assert "/search" in routes
\ No newline at end of file
+    assert "/search" in routes
+
+
+def test_error_response_matches_models():
+    """Test pre-rendered error responses match the Pydantic rendering"""
+    from a2a_adapter.card import JSONRPCError, JSONRPCErrorData, JSONRPCResponse
+    from a2a_adapter.core.rpc import JSONRPCMethodNotFound, JSONRPCSkillNotFound, create_error_response
+    
+    for exc in (JSONRPCMethodNotFound(), JSONRPCSkillNotFound("missing")):
+        expected = JSONRPCResponse(id=7, error=JSONRPCError(
+            code=exc.code, message=exc.message, data=JSONRPCErrorData(error=exc.message)
+        )).model_dump_json(exclude_none=True)
+        assert exc.to_response(7).body == expected.encode()
+    
+    expected = JSONRPCResponse(id="a", error=JSONRPCError(code=-32600, message="Invalid Request"))
+    assert create_error_response("a", -32600, "Invalid Request").body == \
+        expected.model_dump_json(exclude_none=True).encode()
+
+def test_success_response_matches_models():
+    """Test orjson-rendered success responses match the Pydantic rendering"""
+    from a2a_adapter.card import JSONRPCResponse
+    from a2a_adapter.core.rpc import create_success_response, create_task_accepted_response
+    
+    result = {"agents": [{"name": "Test", "tags": None}], "next": None}
+    expected = JSONRPCResponse(id=1, result=result).model_dump_json(exclude_none=True)
+    assert create_success_response(1, result).body == expected.encode()
+    
+    expected = JSONRPCResponse(id="r", result={"taskId": "abc", "status": "accepted"})
+    response = create_task_accepted_response("r", "abc")
+    assert response.status_code == 202
+    assert response.body == expected.model_dump_json(exclude_none=True).encode()
+
+
+def test_upsert_after_lost_insert_race(monkeypatch):
+    """Test upsert updates a card another process inserted concurrently"""
+    import uuid
+    from sqlalchemy.orm import Session
+    from a2a_adapter.card import AgentCard
+    from a2a_adapter.db.registry import AgentCardRepo
+    
+    card_id = f"urn:agent:race-{uuid.uuid4().hex}"
+    repo = AgentCardRepo()
+    repo.upsert(AgentCard(id=card_id, version="1", card={"id": card_id}, skills_text="a"))
+    
+    # Miss the existing row once, as if it was inserted after the lookup
+    real_get = Session.get
+    lookups = []
+    def stale_get(self, *args, **kwargs):
+        lookups.append(args)
+        return None if len(lookups) == 1 else real_get(self, *args, **kwargs)
+    monkeypatch.setattr(Session, "get", stale_get)
+    
+    repo.upsert(AgentCard(id=card_id, version="2", card={"id": card_id}, skills_text="b"))
+    
+    monkeypatch.undo()
+    with repo.session_factory() as db:
+        assert db.get(AgentCard, card_id).version == "2"
+
+
+def test_search_page_full_last_page():
+    """Test an exactly full last page has no next cursor"""
+    import uuid
+    from a2a_adapter.card import AgentCard
+    from a2a_adapter.db.registry import AgentCardRepo
+    
+    word = f"pagetest{uuid.uuid4().hex}"
+    repo = AgentCardRepo()
+    for n in range(2):
+        card_id = f"urn:agent:{word}-{n}"
+        repo.upsert(AgentCard(id=card_id, version="1", card={"id": card_id}, skills_text=word))
+    
+    page = repo.search_page(skill=word, limit=2)
+    assert len(page["items"]) == 2
+    assert page["next"] is None
+    
+    page = repo.search_page(skill=word, limit=1)
+    assert len(page["items"]) == 1
+    page = repo.search_page(skill=word, limit=1, after=page["next"])
+    assert len(page["items"]) == 1
+    assert page["next"] is None
+
+
+def test_search_page_matches_substrings():
+    """Test skill search matches any part of a camelCase skill name"""
+    import uuid
+    from a2a_adapter.card import AgentCard
+    from a2a_adapter.db.registry import AgentCardRepo
+    
+    word = uuid.uuid4().hex
+    card_id = f"urn:agent:substring-{word}"
+    repo = AgentCardRepo()
+    repo.upsert(AgentCard(id=card_id, version="1", card={"id": card_id}, skills_text=f"search{word}Catalog"))
+    
+    for query in (f"{word}catalog", f"h{word}C", word.upper()):
+        assert repo.search(skill=query) == [{"id": card_id}]
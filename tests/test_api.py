@@ -1,8 +1,16 @@
 import pytest
+import asyncio
+import time
+import httpx
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import json
+import uuid
 from types import SimpleNamespace
 from a2a_adapter import skill, register_agent, build_app
+from a2a_adapter.card import AgentCard, AgentCardData, Skill
+from a2a_adapter.db.registry import AgentCardRepo
+from a2a_adapter.api.card_routes import create_card_router
 
 # Create a test agent with skills for testing
 @skill(name="echo", inputTypes=["text"], outputTypes=["text"])
@@ -23,11 +31,12 @@ test_agent = SimpleNamespace(
     tasks=[echo, transform]
 )
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client():
-    """Create a test client"""
+    """Create a test client shared by the tests in this module"""
     app = build_app(test_agent, host="127.0.0.1", port=8080)
-    return TestClient(app)
+    with TestClient(app) as test_client:
+        yield test_client
 
 def test_agent_card_endpoint(client):
     """Test the /agentCard endpoint"""
@@ -58,6 +67,17 @@ def test_agent_card_endpoint(client):
     assert "outputTypes" in skill
     assert "description" in skill
 
+def test_agent_card_etag(client):
+    """Test the /agentCard endpoint honours If-None-Match"""
+    response = client.get("/agentCard")
+    etag = response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+    
+    # A matching ETag returns 304 without a body
+    cached = client.get("/agentCard", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
 def test_tasks_send_jsonrpc(client):
     """Test the /tasks/send endpoint with JSON-RPC"""
     # Prepare JSON-RPC request
@@ -140,6 +160,94 @@ def test_tasks_send_invalid_method(client):
     assert "code" in data["error"]
     assert "message" in data["error"]
 
+def test_tasks_send_invalid_params(client):
+    """Test the /tasks/send endpoint with a malformed params object"""
+    # Prepare JSON-RPC request without a skill name
+    request = {
+        "jsonrpc": "2.0",
+        "id": "test-invalid",
+        "method": "tasks/send",
+        "params": {
+            "input": "hello world"
+        }
+    }
+    
+    # Send request
+    response = client.post("/tasks/send", json=request)
+    
+    # Check error response
+    data = response.json()
+    assert data["id"] == "test-invalid"
+    assert "error" in data
+    assert data["error"]["code"] == -32600
+
+def test_tasks_send_parse_error(client):
+    """Test the /tasks/send endpoint with a body that is not JSON"""
+    # Send malformed JSON
+    response = client.post(
+        "/tasks/send",
+        content=b'{"jsonrpc": "2.0", "id": ',
+        headers={"Content-Type": "application/json"}
+    )
+    
+    # Check error response
+    data = response.json()
+    assert "error" in data
+    assert data["error"]["code"] == -32700
+
+def test_tasks_send_batch(client):
+    """Test the /tasks/send endpoint with a JSON-RPC batch"""
+    # Prepare a batch with one valid and one invalid request
+    batch = [
+        {
+            "jsonrpc": "2.0",
+            "id": "batch-1",
+            "method": "tasks/send",
+            "params": {"agentSkill": "echo", "input": "hello world"}
+        },
+        {
+            "jsonrpc": "2.0",
+            "id": "batch-2",
+            "method": "tasks/send",
+            "params": {"agentSkill": "nonexistent", "input": "hello world"}
+        }
+    ]
+    
+    # Send request
+    response = client.post("/tasks/send", json=batch)
+    
+    # Check one response per request, in order
+    data = response.json()
+    assert [item["id"] for item in data] == ["batch-1", "batch-2"]
+    assert data[0]["result"]["status"] == "accepted"
+    assert "error" in data[1]
+    
+    # Check an empty batch is rejected
+    response = client.post("/tasks/send", json=[])
+    assert response.json()["error"]["code"] == -32600
+
+def test_tasks_send_stream(client):
+    """Test /tasks/send streams the task events when asked to"""
+    request = {
+        "jsonrpc": "2.0",
+        "id": "stream-1",
+        "method": "tasks/send",
+        "params": {
+            "agentSkill": "echo",
+            "input": "Hello, world!"
+        }
+    }
+    
+    response = client.post("/tasks/send?stream=true", json=request)
+    
+    # The events arrive on the send response itself
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("event: "):] for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["accepted", "running", "completed"]
+    assert '"id":"stream-1"' in response.text
+    assert "Hello, world!" in response.text
+
 def test_search_endpoint(client):
     """Test the /search endpoint"""
     # Prepare JSON-RPC request
@@ -163,4 +271,103 @@ def test_search_endpoint(client):
     assert "id" in data
     assert data["id"] == "search-1"
     assert "result" in data
-    assert "agents" in data["result"]
\ No newline at end of file
+    assert "agents" in data["result"]
+
+
+def test_search_pagination(client):
+    """Test paging through /search results with a cursor"""
+    # Seed two cards that only this test's query matches
+    word = f"paging{uuid.uuid4().hex}"
+    repo = AgentCardRepo()
+    for n in range(2):
+        repo.upsert(AgentCard.from_data(AgentCardData(
+            id=f"urn:agent:{word}-{n}",
+            name=f"Paging Agent {n}",
+            version="0.1.0",
+            description="Agent for testing search pagination",
+            skills=[Skill(name=word)],
+            url="http://127.0.0.1:8080",
+            endpoints={}
+        )))
+    
+    # Request the first page
+    request = {
+        "jsonrpc": "2.0",
+        "id": "search-page-1",
+        "method": "skills/search",
+        "params": {"query": word, "limit": 1}
+    }
+    response = client.post("/search", json=request)
+    result = response.json()["result"]
+    assert len(result["agents"]) == 1
+    assert result["next"] is not None
+    
+    # Request the last page with the cursor
+    request["params"]["after"] = result["next"]
+    response = client.post("/search", json=request)
+    result = response.json()["result"]
+    assert len(result["agents"]) == 1
+    assert result["next"] is None
+    
+    # A malformed cursor is rejected as invalid params
+    request["params"]["after"] = "not-a-cursor"
+    response = client.post("/search", json=request)
+    assert response.json()["error"]["code"] == -32602
+
+def test_search_parse_error(client):
+    """Test the /search endpoint with a body that is not JSON"""
+    # Send malformed JSON
+    response = client.post(
+        "/search",
+        content=b'{"jsonrpc": "2.0", "id": ',
+        headers={"Content-Type": "application/json"}
+    )
+    
+    # Check error response
+    data = response.json()
+    assert "error" in data
+    assert data["error"]["code"] == -32700
+
+def test_search_missing_method(client):
+    """Test the /search endpoint with a request that has no method"""
+    response = client.post("/search", json={"jsonrpc": "2.0", "id": "search-2"})
+    
+    data = response.json()
+    assert data["id"] == "search-2"
+    assert data["error"]["code"] == -32601
+
+def test_search_etag(client):
+    """Test the GET /search endpoint honours If-None-Match"""
+    response = client.get("/search", params={"skill": "echo"})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    
+    # A matching ETag returns 304 without a body
+    cached = client.get("/search", params={"skill": "echo"}, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+@pytest.mark.asyncio
+async def test_search_coalesces_concurrent_queries():
+    """Test concurrent identical searches share a single database query"""
+    class CountingRepo:
+        calls = 0
+        
+        def search_page(self, **query):
+            CountingRepo.calls += 1
+            time.sleep(0.05)  # Simulate a slow query
+            return {"items": [], "next": None}
+    
+    app = FastAPI()
+    app.include_router(create_card_router({"name": "Test Agent"}, CountingRepo()))
+    
+    # Send identical searches at once
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        responses = await asyncio.gather(*(
+            http.get("/search", params={"skill": "echo"}) for _ in range(5)
+        ))
+    
+    # Check every request was answered from one query
+    assert [r.status_code for r in responses] == [200] * 5
+    assert CountingRepo.calls == 1
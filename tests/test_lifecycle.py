@@ -2,6 +2,16 @@ import pytest
 import asyncio
 from a2a_adapter.core.lifecycle import create_task, get_task, task_exists, generate_task_events
 
+def parse_event(raw):
+    """Parse an encoded server-sent event into its fields"""
+    return dict(line.split(": ", 1) for line in raw.decode().strip().split("\n"))
+
+async def wait_finished(task_id):
+    """Wait for a task to complete or fail by following its events"""
+    async for raw in generate_task_events(task_id):
+        pass
+    return await get_task(task_id)
+
 @pytest.mark.asyncio
 async def test_task_lifecycle():
     """Test the full task lifecycle with concurrency"""
@@ -22,11 +32,7 @@ async def test_task_lifecycle():
     assert task["status"] in ["accepted", "running"]
     
     # Wait for completion
-    for _ in range(20):  # Allow time for task to complete
-        await asyncio.sleep(0.1)
-        task = await get_task(task_id)
-        if task["status"] == "completed":
-            break
+    task = await wait_finished(task_id)
     
     # Check final state
     assert task["status"] == "completed"
@@ -45,7 +51,8 @@ async def test_task_events():
     
     # Collect events
     events = []
-    async for event in generate_task_events(task_id):
+    async for raw in generate_task_events(task_id):
+        event = parse_event(raw)
         events.append(event["event"])
         if event["event"] == "completed":
             break
@@ -66,26 +73,239 @@ async def test_concurrent_tasks():
         await asyncio.sleep(0.1)
         return f"Result: {args}"
     
-    # Create multiple tasks
-    task_ids = []
-    for i in range(5):
-        task_id = await create_task(test_fn, f"input-{i}", f"request-{i}")
-        task_ids.append(task_id)
+    # Create multiple tasks concurrently
+    task_ids = await asyncio.gather(*(
+        create_task(test_fn, f"input-{i}", f"request-{i}") for i in range(5)
+    ))
     
     # Wait for all tasks to complete
-    for _ in range(20):
-        all_completed = True
-        for task_id in task_ids:
-            task = await get_task(task_id)
-            if task["status"] != "completed":
-                all_completed = False
-                break
-        if all_completed:
-            break
-        await asyncio.sleep(0.1)
+    tasks = await asyncio.gather(*(wait_finished(task_id) for task_id in task_ids))
     
     # Verify all tasks completed successfully
-    for i, task_id in enumerate(task_ids):
-        task = await get_task(task_id)
+    for i, task in enumerate(tasks):
         assert task["status"] == "completed"
-        assert task["result"] == f"Result: input-{i}"
\ No newline at end of file
+        assert task["result"] == f"Result: input-{i}"
+
+
+@pytest.mark.asyncio
+async def test_task_events_resume():
+    """Test resuming a task event stream with a Last-Event-ID"""
+    # Create a test task function
+    async def test_fn(args):
+        await asyncio.sleep(0.1)  # Simulate work
+        return f"Result: {args}"
+    
+    # Create a task
+    task_id = await create_task(test_fn, "test input", "request-123")
+    
+    # Read the first event and remember its ID
+    first = None
+    async for raw in generate_task_events(task_id):
+        first = parse_event(raw)
+        break
+    assert first["event"] == "accepted"
+    
+    # Resume after the first event
+    events = []
+    async for raw in generate_task_events(task_id, last_event_id=first["id"]):
+        events.append(parse_event(raw)["event"])
+    
+    # Verify only the missed events are replayed
+    assert events == ["running", "completed"]
+
+@pytest.mark.asyncio
+async def test_async_callable_object():
+    """Test a callable object with an async __call__ is awaited"""
+    class Tool:
+        async def __call__(self, args):
+            await asyncio.sleep(0.01)
+            return f"Result: {args}"
+    
+    # Create a task
+    task_id = await create_task(Tool(), "test input", "request-123")
+    
+    # Consume events until the task finishes
+    async for event in generate_task_events(task_id):
+        pass
+    
+    # Check final state
+    task = await get_task(task_id)
+    assert task["status"] == "completed"
+    assert task["result"] == "Result: test input"
+
+@pytest.mark.asyncio
+async def test_task_events_subscriber_released():
+    """Test a closed event stream releases its subscription"""
+    # Create a test task function
+    async def test_fn(args):
+        await asyncio.sleep(0.1)  # Simulate work
+        return f"Result: {args}"
+    
+    # Create a task
+    task_id = await create_task(test_fn, "test input", "request-123")
+    
+    # Subscribe, then close the stream early as a disconnecting client would
+    stream = generate_task_events(task_id)
+    await stream.__anext__()
+    task = await get_task(task_id)
+    assert task["subscribers"] == 1
+    await stream.aclose()
+    
+    # Verify the subscription was released
+    assert task["subscribers"] == 0
+
+@pytest.mark.asyncio
+async def test_task_events_not_polled():
+    """Test events are delivered on transition rather than on a polling tick"""
+    # Create a task that finishes immediately
+    async def test_fn(args):
+        return f"Result: {args}"
+    
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    task_id = await create_task(test_fn, "test input", "request-123")
+    
+    # Consume the whole stream
+    events = [parse_event(raw)["event"] async for raw in generate_task_events(task_id)]
+    
+    # A polling loop would add at least one 100ms tick
+    assert events == ["accepted", "running", "completed"]
+    assert loop.time() - started < 0.1
+
+@pytest.mark.asyncio
+async def test_inflight_limit(monkeypatch):
+    """Test tasks beyond the in-flight limit wait as accepted"""
+    from a2a_adapter.core import lifecycle
+    monkeypatch.setitem(lifecycle._task_slots, asyncio.get_running_loop(), asyncio.Semaphore(1))
+    
+    # Create a test task function
+    async def test_fn(args):
+        await asyncio.sleep(0.1)  # Simulate work
+        return f"Result: {args}"
+    
+    # Create two tasks with a single execution slot
+    first_id = await create_task(test_fn, "first", "request-1")
+    second_id = await create_task(test_fn, "second", "request-2")
+    await asyncio.sleep(0.05)
+    
+    # Only the first task runs
+    assert (await get_task(first_id))["status"] == "running"
+    assert (await get_task(second_id))["status"] == "accepted"
+    
+    # The second task runs once the slot frees up
+    async for event in generate_task_events(second_id):
+        pass
+    assert (await get_task(second_id))["result"] == "Result: second"
+
+def test_inflight_limit_per_loop(monkeypatch):
+    """Test execution slots work in every event loop that contends them"""
+    from a2a_adapter.core import lifecycle
+    monkeypatch.setattr(lifecycle, "MAX_INFLIGHT_TASKS", 1)
+    
+    async def test_fn(args):
+        await asyncio.sleep(0.01)  # Simulate work
+        return f"Result: {args}"
+    
+    async def run_two():
+        first_id = await create_task(test_fn, "first", "request-1")
+        second_id = await create_task(test_fn, "second", "request-2")
+        return [(await wait_finished(task_id))["status"] for task_id in (first_id, second_id)]
+    
+    # The second loop must not reuse the semaphore bound to the first
+    assert asyncio.run(run_two()) == ["completed", "completed"]
+    assert asyncio.run(run_two()) == ["completed", "completed"]
+
+@pytest.mark.asyncio
+async def test_queued_task_cancelled(monkeypatch):
+    """Test a task cancelled while waiting for a slot is failed"""
+    from a2a_adapter.core import lifecycle
+    monkeypatch.setitem(lifecycle._task_slots, asyncio.get_running_loop(), asyncio.Semaphore(1))
+    
+    async def test_fn(args):
+        await asyncio.sleep(1)  # Simulate work
+        return f"Result: {args}"
+    
+    await create_task(test_fn, "first", "request-1")
+    second_id = await create_task(test_fn, "second", "request-2")
+    await asyncio.sleep(0.01)
+    assert (await get_task(second_id))["status"] == "accepted"
+    
+    # Cancel the running task and the queued one
+    background = asyncio.all_tasks() - {asyncio.current_task()}
+    for pending in background:
+        pending.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    
+    task = await get_task(second_id)
+    assert task["status"] == "failed"
+    assert task["error"] == "Task was cancelled"
+
+@pytest.mark.asyncio
+async def test_queued_task_not_timed_out(monkeypatch):
+    """Test waiting for an execution slot does not count as a start timeout"""
+    from a2a_adapter.core import lifecycle
+    monkeypatch.setitem(lifecycle._task_slots, asyncio.get_running_loop(), asyncio.Semaphore(1))
+    monkeypatch.setattr(lifecycle, "TASK_START_TIMEOUT", 0.05)
+    
+    # Create a test task function that outlasts the start timeout
+    async def test_fn(args):
+        await asyncio.sleep(0.2)  # Simulate work
+        return f"Result: {args}"
+    
+    await create_task(test_fn, "first", "request-1")
+    second_id = await create_task(test_fn, "second", "request-2")
+    
+    # The queued task is not failed while the first one holds the slot
+    task = await wait_finished(second_id)
+    assert task["status"] == "completed"
+    assert task["result"] == "Result: second"
+
+@pytest.mark.asyncio
+async def test_finished_task_expires(monkeypatch):
+    """Test finished tasks are removed from the store after the TTL"""
+    from a2a_adapter.core import lifecycle
+    monkeypatch.setattr(lifecycle, "TASK_TTL", 0.05)
+    
+    # Create a task that finishes immediately
+    async def test_fn(args):
+        return f"Result: {args}"
+    
+    task_id = await create_task(test_fn, "test input", "request-123")
+    async for event in generate_task_events(task_id):
+        pass
+    assert await task_exists(task_id)
+    
+    # The task is gone once the TTL has passed
+    await asyncio.sleep(0.1)
+    assert not await task_exists(task_id)
+
+@pytest.mark.asyncio
+async def test_task_store_limit(monkeypatch):
+    """Test a full store evicts the oldest finished task and rejects new tasks when none has finished"""
+    from a2a_adapter.core import lifecycle
+    from a2a_adapter.core.rpc import JSONRPCTaskLimitReached
+    monkeypatch.setattr(lifecycle, "_tasks", {})
+    monkeypatch.setattr(lifecycle, "_finished", {})
+    monkeypatch.setattr(lifecycle, "MAX_TASKS", 2)
+    
+    async def quick_fn(args):
+        return f"Result: {args}"
+    
+    async def slow_fn(args):
+        await asyncio.sleep(0.2)  # Simulate work
+        return f"Result: {args}"
+    
+    # A new task replaces the oldest finished one
+    first_id = await create_task(quick_fn, "first", "request-1")
+    await wait_finished(first_id)
+    second_id = await create_task(slow_fn, "second", "request-2")
+    third_id = await create_task(slow_fn, "third", "request-3")
+    assert not await task_exists(first_id)
+    assert await task_exists(second_id) and await task_exists(third_id)
+    
+    # With no finished task to evict, the task is rejected
+    with pytest.raises(JSONRPCTaskLimitReached):
+        await create_task(quick_fn, "fourth", "request-4")
+    
+    await wait_finished(second_id)
+    await wait_finished(third_id)